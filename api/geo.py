@@ -0,0 +1,203 @@
+from math import radians, degrees, sin, cos, sqrt, atan2, asin
+
+import numpy as np
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371  # Earth radius in kilometers
+
+# Geohash length stored on Salon.geohash (~38m x 19m cells).
+GEOHASH_PRECISION = 8
+
+# Cell sizes tried by nearest_salons, finest first. Each step widens the
+# searched neighbourhood until it is guaranteed to hold the k nearest salons.
+SEARCH_PRECISIONS = (6, 5, 4, 3, 2)
+
+# Distances closer than this (1 micron) count as equal when paging by cursor.
+CURSOR_TOLERANCE_KM = 1e-9
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {char: index for index, char in enumerate(_BASE32)}
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Return ``(min_lat, max_lat, lon_ranges)`` enclosing the circle of
+    ``radius_km`` around the point. ``lon_ranges`` holds two ranges when the
+    box crosses the antimeridian and spans every longitude near the poles.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    min_lat = lat - degrees(angular)
+    max_lat = lat + degrees(angular)
+    if min_lat <= -90 or max_lat >= 90 or sin(angular) >= cos(radians(lat)):
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    delta_lon = degrees(asin(sin(angular) / cos(radians(lat))))
+    min_lon = lon - delta_lon
+    max_lon = lon + delta_lon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def bounding_box_filter(lat, lon, radius_km):
+    """Build a Q restricting ``latitude``/``longitude`` to the circle's bounding box."""
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+    lon_query = Q()
+    for min_lon, max_lon in lon_ranges:
+        lon_query |= Q(longitude__gte=min_lon, longitude__lte=max_lon)
+    return Q(latitude__gte=min_lat, latitude__lte=max_lat) & lon_query
+
+
+def haversine_matrix(origin_lats, origin_lons, lats, lons):
+    """
+    Vectorised haversine: distances in km from every origin to every point,
+    as an array of shape ``(len(origins), len(points))``.
+    """
+    origin_lats = np.radians(np.atleast_1d(np.asarray(origin_lats, dtype=np.float64)))[:, np.newaxis]
+    origin_lons = np.radians(np.atleast_1d(np.asarray(origin_lons, dtype=np.float64)))[:, np.newaxis]
+    lats = np.radians(np.asarray(lats, dtype=np.float64))[np.newaxis, :]
+    lons = np.radians(np.asarray(lons, dtype=np.float64))[np.newaxis, :]
+
+    a = np.sin((lats - origin_lats) / 2) ** 2 + np.cos(origin_lats) * np.cos(lats) * np.sin((lons - origin_lons) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_many(lat, lon, lats, lons):
+    """Distances in km from a single origin to each point in ``lats``/``lons``."""
+    return haversine_matrix(lat, lon, lats, lons)[0]
+
+
+def after_key(distances, ids, after):
+    """Mask of entries ordered strictly after the ``(distance, id)`` key ``after``."""
+    if after is None:
+        return np.ones(len(distances), dtype=bool)
+    after_distance, after_id = after
+    # Distances are recomputed on every page, so compare with a tolerance far
+    # below any real separation between salons before falling back to id.
+    tied = np.abs(distances - after_distance) <= CURSOR_TOLERANCE_KM
+    return ((distances > after_distance) & ~tied) | (tied & (ids > after_id))
+
+
+def top_k(distances, ids, k):
+    """
+    Return positions of the ``k`` smallest distances ordered by
+    ``(distance, id)``. Uses a partial selection rather than sorting the
+    whole array, so only the winners are ever sorted.
+    """
+    if k <= 0 or not len(distances):
+        return np.empty(0, dtype=np.intp)
+    if len(distances) > k:
+        # Keep every entry tied with the k-th distance so id breaks ties exactly.
+        threshold = np.partition(distances, k - 1)[k - 1]
+        positions = np.flatnonzero(distances <= threshold)
+    else:
+        positions = np.arange(len(distances))
+    order = np.lexsort((ids[positions], distances[positions]))
+    return positions[order[:k]]
+
+
+def geohash_encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """Return ``(min_lat, max_lat, min_lon, max_lon)`` of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_cell_size(precision):
+    """Return the ``(height, width)`` in degrees of a cell at ``precision``."""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def geohash_neighbourhood(lat, lon, precision):
+    """
+    Return the 3x3 block of cells centred on the cell containing the point,
+    together with the radius (km) around the point the block is guaranteed
+    to cover. Returns ``None`` when the block would wrap over a pole.
+    """
+    height, width = geohash_cell_size(precision)
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds(geohash_encode(lat, lon, precision))
+    if min_lat - height < -90 or max_lat + height > 90:
+        return None
+
+    centre_lat = (min_lat + max_lat) / 2
+    centre_lon = (min_lon + max_lon) / 2
+    cells = set()
+    for dlat in (-1, 0, 1):
+        for dlon in (-1, 0, 1):
+            cell_lon = (centre_lon + dlon * width + 180) % 360 - 180
+            cells.add(geohash_encode(centre_lat + dlat * height, cell_lon, precision))
+
+    # Anything outside the block is at least one cell away from the point,
+    # either along the meridian or along the widest parallel in the band.
+    lat_radius = EARTH_RADIUS_KM * radians(height)
+    if width * 3 >= 360:
+        return cells, lat_radius
+    max_abs_lat = max(abs(min_lat - height), abs(max_lat + height))
+    lon_radius = 2 * EARTH_RADIUS_KM * asin(cos(radians(max_abs_lat)) * sin(radians(width) / 2))
+    return cells, min(lat_radius, lon_radius)
+
+
+def geohash_prefix_filter(prefixes, field='geohash'):
+    """Build a Q matching rows whose geohash starts with any of ``prefixes``.
+
+    Uses ``>=``/``<`` ranges rather than ``LIKE`` so the lookup stays on the
+    column's B-tree index on every backend.
+    """
+    query = Q()
+    for prefix in prefixes:
+        query |= Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '~'})
+    return query
@@ -0,0 +1,43 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.search_index import SEARCH_TYPES
+from api.trigram_index import TrigramIndex
+
+WORDS = ['glamour', 'studio', 'salon', 'hair', 'beauty', 'barber', 'lounge', 'style', 'cuts', 'colour', 'bella',
+         'elite', 'urban', 'crown', 'shear', 'luxe', 'velvet', 'golden', 'silver', 'olive', 'maple', 'harbour']
+
+
+class Command(BaseCommand):
+    help = 'Times loading and querying the fuzzy-search trigram index on synthetic names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        kinds = list(SEARCH_TYPES)
+        names = [' '.join(rng.sample(WORDS, 2)) + f' {rng.choice(WORDS)[:4]}{i}' for i in range(options['entities'])]
+
+        index = TrigramIndex(kinds)
+        started = time.perf_counter()
+        index.load((kinds[i % len(kinds)], i, name) for i, name in enumerate(names))
+        load_seconds = time.perf_counter() - started
+        memory = sum(postings.nbytes for postings in index._postings.values()) \
+            + sum(len(column) * column.itemsize for column in (index._kinds, index._pks, index._sizes))
+
+        timings = []
+        for _ in range(options['queries']):
+            query = list(rng.choice(names).rsplit(' ', 1)[0])
+            query[rng.randrange(len(query))] = rng.choice('aeiourst')  # one typo
+            started = time.perf_counter()
+            index.search(''.join(query), kinds, 0.4)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+
+        self.stdout.write(
+            f'{len(index)} entities: load {load_seconds:.2f}s, index arrays {memory / 2 ** 20:.1f}MiB, '
+            f'lookup p50 {timings[len(timings) // 2] * 1000:.2f}ms p99 {timings[int(len(timings) * 0.99)] * 1000:.2f}ms')
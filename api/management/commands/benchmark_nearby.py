@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.geo import geohash_encode
+from api.models import Salon
+from api.nearby import invalidate_salon_snapshot, nearest_salons
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Times SalonViewSet.nearby lookups against synthetic salon catalogues of growing size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Salons cluster around cities rather than spreading evenly over the globe.
+        cities = [(rng.uniform(-55, 65), rng.uniform(-180, 180)) for _ in range(500)]
+
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    self._populate(size, cities, rng)
+                    timings = self._run(options['queries'], options['limit'], cities, rng)
+                    raise Rollback
+            except Rollback:
+                pass
+            timings.sort()
+            p50 = timings[len(timings) // 2] * 1000
+            p95 = timings[int(len(timings) * 0.95)] * 1000
+            self.stdout.write(f'{size:>9} salons: p50 {p50:.2f}ms  p95 {p95:.2f}ms')
+
+    def _populate(self, size, cities, rng):
+        Salon.objects.all().delete()
+        batch = []
+        for i in range(size):
+            city_lat, city_lon = rng.choice(cities)
+            lat = min(max(rng.gauss(city_lat, 0.2), -89.9), 89.9)
+            lon = (rng.gauss(city_lon, 0.2) + 180) % 360 - 180
+            # bulk_create skips Salon.save(), so fill the index column here.
+            batch.append(Salon(
+                name=f'Salon {i}', address='Benchmark', city='Benchmark', phone='+1234567890',
+                latitude=lat, longitude=lon, geohash=geohash_encode(lat, lon),
+            ))
+            if len(batch) == 5000:
+                Salon.objects.bulk_create(batch)
+                batch = []
+        Salon.objects.bulk_create(batch)
+        invalidate_salon_snapshot()
+
+    def _run(self, queries, limit, cities, rng):
+        timings = []
+        for _ in range(queries):
+            city_lat, city_lon = rng.choice(cities)
+            lat = rng.gauss(city_lat, 0.1)
+            lon = rng.gauss(city_lon, 0.1)
+            start = time.perf_counter()
+            nearest_salons(lat, lon, limit)
+            timings.append(time.perf_counter() - start)
+        return timings
@@ -0,0 +1,72 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Salon
+from api.serializers import SalonSerializer
+from utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Times the stdlib JSONRenderer against ORJSONRenderer on /api/salons/- and /dashboard/-shaped payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        payloads = [('salons', self.salons_payload(rows)), ('dashboard', self.dashboard_payload(rows))]
+        stdlib, fast = JSONRenderer(), ORJSONRenderer()
+        for name, data in payloads:
+            slow_seconds = self._best(lambda: stdlib.render(data), options['repeat'])
+            fast_seconds = self._best(lambda: fast.render(data), options['repeat'])
+            size = len(stdlib.render(data))
+            identical = stdlib.render(data) == fast.render(data)
+            self.stdout.write(
+                f'{name:<10} {size / 1024:8.1f}KiB: json {size / slow_seconds / 2 ** 20:7.1f}MiB/s  '
+                f'orjson {size / fast_seconds / 2 ** 20:7.1f}MiB/s  ({slow_seconds / fast_seconds:.1f}x)  '
+                f'identical={identical}')
+
+    @staticmethod
+    def salons_payload(rows):
+        salons = [Salon(id=i, name=f'Salon {i}', latitude=40 + i / 1e5, longitude=-73 - i / 1e5,
+                        address=f'{i} Main St, Brooklyn') for i in range(1, rows + 1)]
+        return {'count': rows, 'next': None, 'previous': None,
+                'results': SalonSerializer(salons, many=True).data}
+
+    @staticmethod
+    def dashboard_payload(rows):
+        # The admin dashboard mixes counts, raw Decimals from aggregates and
+        # dates/datetimes from .values() rows.
+        now = timezone.now()
+        return {
+            'user_stats': {'total_users': rows, 'active_users': rows - 3, 'new_users_last_30_days': 42,
+                           'user_roles': [{'role': 'customer', 'count': rows - 50}, {'role': 'stylist', 'count': 50}]},
+            'revenue_stats': {'total_revenue': Decimal('123456.50'), 'revenue_last_30_days': Decimal('9876.25'),
+                              'average_appointment_value': Decimal('45.10')},
+            'recent_activities': {
+                'recent_appointments': [
+                    {'id': i, 'customer__username': f'customer{i}', 'salon__name': f'Salon {i % 40}',
+                     'date': (now - timedelta(days=i % 30)).date(), 'start_time': now.time().replace(microsecond=0),
+                     'status': 'BOOKED', 'total_price': Decimal(i % 200) + Decimal('0.50')}
+                    for i in range(rows)],
+                'recent_users': [
+                    {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+                     'date_joined': now - timedelta(minutes=i, microseconds=i)}
+                    for i in range(rows)],
+            },
+        }
+
+    @staticmethod
+    def _best(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
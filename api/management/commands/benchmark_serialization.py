@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Promotion, Salon, Service, Stylist
+from api.serializers import PromotionSerializer, SalonSerializer, ServiceSerializer, StylistSerializer
+from utils.serialization import compile_values_serializer
+
+
+class Command(BaseCommand):
+    help = 'Times ModelSerializer list output against the compiled .values() fast path on in-memory rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        now = timezone.now()
+        cases = [
+            (SalonSerializer, {'distance': None}, Salon, lambda i: dict(
+                id=i, name=f'Salon {i}', latitude=40 + i / 1e5, longitude=-73 - i / 1e5, address=f'{i} Main St')),
+            (ServiceSerializer, {}, Service, lambda i: dict(
+                id=i, name=f'Service {i}', description='Wash, cut and finish', price=Decimal(i % 200) + Decimal('0.5'),
+                duration=30, salon_id=i % 100 + 1)),
+            (StylistSerializer, {}, Stylist, lambda i: dict(
+                id=i, name=f'Stylist {i}', email=f's{i}@example.com', phone='+1234567890', specialties='Cuts',
+                user_id=None, workplace_id=i % 50 or None, years_of_experience=i % 30, salon_id=i % 100 + 1)),
+            (PromotionSerializer, {}, Promotion, lambda i: dict(
+                id=i, title=f'Promo {i}', description='', discount_percentage=i % 50,
+                valid_until=now + timedelta(seconds=i))),
+        ]
+        renderer = JSONRenderer()
+        for serializer_class, constants, model, make_row in cases:
+            columns, to_dict = compile_values_serializer(serializer_class, tuple(constants.items()))
+            data = [make_row(i) for i in range(1, rows + 1)]
+            instances = [model(**row) for row in data]
+            values = [{column: row[column] for column in columns} for row in data]
+
+            slow = self._best(lambda: serializer_class(instances, many=True).data, options['repeat'])
+            fast = self._best(lambda: [to_dict(row) for row in values], options['repeat'])
+            identical = (renderer.render(serializer_class(instances, many=True).data)
+                         == renderer.render([to_dict(row) for row in values]))
+            self.stdout.write(
+                f'{serializer_class.__name__:<20} {rows} rows: serializer {slow * 1000:8.1f}ms  '
+                f'values {fast * 1000:7.1f}ms  ({slow / fast:.1f}x)  identical={identical}')
+
+    @staticmethod
+    def _best(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
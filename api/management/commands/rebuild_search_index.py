@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import search_index
+
+
+class Command(BaseCommand):
+    help = 'Repopulates the full-text search index from the salon, stylist and service tables'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+from api.geo import geohash_encode
+
+
+def populate_geohash(apps, schema_editor):
+    Salon = apps.get_model('api', 'Salon')
+    salons = Salon.objects.exclude(latitude=None).exclude(longitude=None)
+    for salon in salons.iterator():
+        salon.geohash = geohash_encode(salon.latitude, salon.longitude)
+        salon.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_alter_salon_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
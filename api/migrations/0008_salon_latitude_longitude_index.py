@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_salon_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salon',
+            index=models.Index(fields=['latitude', 'longitude'], name='api_salon_latitud_b20858_idx'),
+        ),
+    ]
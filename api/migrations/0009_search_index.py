@@ -0,0 +1,28 @@
+# FTS5 tables behind GlobalSearchView (see api/search_index.py).
+
+from django.db import migrations
+
+TABLES = {
+    'api_salon_fts': ('api_salon', 'name, address, description'),
+    'api_stylist_fts': ('api_stylist', 'name, specialties'),
+    'api_service_fts': ('api_service', 'name, description'),
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_salon_latitude_longitude_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, "
+                f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+                f"INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {source}",
+            ],
+            reverse_sql=f"DROP TABLE {table}",
+        )
+        for table, (source, columns) in TABLES.items()
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
+from .geo import geohash_encode
 
 class Salon(models.Model):
     owner = models.ForeignKey(
@@ -14,6 +15,7 @@ class Salon(models.Model):
     address = models.CharField(max_length=200)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)
     address = models.CharField(max_length=255)
     city = models.CharField(max_length=100)
     phone = models.CharField(
@@ -42,11 +44,23 @@ class Salon(models.Model):
             models.Index(fields=['name']),
             models.Index(fields=['city']),
             models.Index(fields=['rating']),
+            models.Index(fields=['latitude', 'longitude']),
         ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Keep the spatial index column in step with the coordinates.
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
 class Service(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
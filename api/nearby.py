@@ -0,0 +1,161 @@
+import base64
+import binascii
+import threading
+import time
+
+import numpy as np
+
+from .geo import (SEARCH_PRECISIONS, after_key, bounding_box_filter, geohash_neighbourhood,
+                  geohash_prefix_filter, haversine_many, top_k)
+from .models import Salon
+
+# Seconds a coordinate snapshot is trusted before it is rebuilt. Signals drop
+# it immediately on local writes; this bounds staleness from other processes.
+SNAPSHOT_TTL = 300
+
+
+class SalonSnapshot:
+    """Array-backed ids, latitudes and longitudes of a set of located salons."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        self.lats = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        self.lons = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, lat, lon, limit, radius_km=None, after=None):
+        """
+        Return ``(ids, distances)`` of the ``limit`` closest salons ordered
+        after the ``(distance, id)`` key ``after``, optionally within
+        ``radius_km``.
+        """
+        distances = haversine_many(lat, lon, self.lats, self.lons)
+        mask = after_key(distances, self.ids, after)
+        if radius_km is not None:
+            mask &= distances <= radius_km
+        eligible = np.flatnonzero(mask)
+        positions = eligible[top_k(distances[eligible], self.ids[eligible], limit)]
+        return self.ids[positions], distances[positions]
+
+
+def encode_cursor(salon):
+    """Opaque cursor for the page following ``salon``."""
+    return base64.urlsafe_b64encode(f'{salon.distance!r}:{salon.pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the ``(distance, id)`` key encoded in ``cursor``; raises ValueError."""
+    try:
+        distance, salon_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(distance), int(salon_id)
+    except (TypeError, UnicodeError, binascii.Error) as exc:
+        raise ValueError('Invalid cursor.') from exc
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_salon_snapshot():
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.built_at < SNAPSHOT_TTL:
+        return snapshot
+    with _snapshot_lock:
+        if _snapshot is None or time.monotonic() - _snapshot.built_at >= SNAPSHOT_TTL:
+            rows = Salon.objects.exclude(latitude=None).exclude(longitude=None).values_list('pk', 'latitude', 'longitude')
+            _snapshot = SalonSnapshot(rows)
+        return _snapshot
+
+
+def invalidate_salon_snapshot():
+    global _snapshot
+    _snapshot = None
+
+
+def _load(ids, distances):
+    """Fetch salons for ``ids`` in order, annotated with their distance."""
+    salons = Salon.objects.in_bulk(ids.tolist())
+    result = []
+    for salon_id, distance in zip(ids.tolist(), distances.tolist()):
+        salon = salons.get(salon_id)
+        if salon is not None:
+            salon.distance = distance
+            result.append(salon)
+    return result
+
+
+def nearest_salons(lat, lon, limit, after=None):
+    """
+    Return the ``limit`` salons closest to ``(lat, lon)``, ordered by
+    distance then id, each annotated with ``distance`` in km. ``after`` is
+    the ``(distance, id)`` of the last salon on the previous page.
+    """
+    return _load(*nearest_ids(lat, lon, limit, after=after))
+
+
+def nearest_ids(lat, lon, limit, after=None):
+    """
+    :func:`nearest_salons` as ``(ids, distances)`` arrays, without loading rows.
+
+    Candidates are fetched by geohash cell, growing the searched block until
+    it provably contains ``limit`` salons; sparse areas fall back to the
+    in-memory coordinate snapshot.
+    """
+    for precision in SEARCH_PRECISIONS:
+        neighbourhood = geohash_neighbourhood(lat, lon, precision)
+        if neighbourhood is None:
+            continue
+        cells, radius = neighbourhood
+        rows = Salon.objects.filter(geohash_prefix_filter(cells)).values_list('pk', 'latitude', 'longitude')
+        candidates = SalonSnapshot(rows)
+        if len(candidates) < limit:
+            continue
+        distances = haversine_many(lat, lon, candidates.lats, candidates.lons)
+        within = np.flatnonzero((distances <= radius) & after_key(distances, candidates.ids, after))
+        if len(within) >= limit:
+            positions = within[top_k(distances[within], candidates.ids[within], limit)]
+            return candidates.ids[positions], distances[positions]
+
+    return get_salon_snapshot().nearest(lat, lon, limit, after=after)
+
+
+def tile_candidates(lat, lon, limit, radius_km, slack_km):
+    """
+    Return ``(candidates, reach_km)``: a snapshot holding every salon that can
+    be among the first ``limit`` results, optionally within ``radius_km``, for
+    any point within ``slack_km`` of ``(lat, lon)``. ``reach_km`` is how far
+    from ``(lat, lon)`` they were collected (``None``: every salon).
+
+    If the ``limit``-th nearest salon from the centre is ``r`` away, every
+    point in reach has ``limit`` salons within ``r + slack_km``, so none of
+    its results lie farther than ``r + 2 * slack_km`` from the centre.
+    """
+    ids, distances = nearest_ids(lat, lon, limit)
+    reach_km = distances[-1] + 2 * slack_km if len(ids) >= limit else None
+    if radius_km is not None:
+        reach_km = radius_km + slack_km if reach_km is None else min(reach_km, radius_km + slack_km)
+    if reach_km is None:
+        return get_salon_snapshot(), None
+    rows = Salon.objects.filter(bounding_box_filter(lat, lon, reach_km)).values_list('pk', 'latitude', 'longitude')
+    return SalonSnapshot(rows), float(reach_km)
+
+
+def rank_candidates(candidates, lat, lon, limit, radius_km=None):
+    """The first ``limit`` salons of ``candidates`` as seen from ``(lat, lon)``, loaded."""
+    return _load(*candidates.nearest(lat, lon, limit, radius_km=radius_km))
+
+
+def salons_within(lat, lon, radius_km, limit, after=None):
+    """
+    Return up to ``limit`` salons within ``radius_km`` of ``(lat, lon)``,
+    ordered and paged like :func:`nearest_salons`. Only rows inside the
+    circle's bounding box are read, using the latitude/longitude index.
+    """
+    rows = Salon.objects.filter(bounding_box_filter(lat, lon, radius_km)).values_list('pk', 'latitude', 'longitude')
+    ids, distances = SalonSnapshot(rows).nearest(lat, lon, limit, radius_km=radius_km, after=after)
+    return _load(ids, distances)
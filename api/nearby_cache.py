@@ -0,0 +1,131 @@
+"""
+Candidate cache for /api/salons/nearby/.
+
+Requests are grouped by small geohash tile. Each entry holds the ids and
+coordinates of every salon that can appear in the answer for any point in
+the tile (see ``nearby.tile_candidates``). A request re-ranks those
+candidates from its own exact coordinates, so clients a few metres apart
+share one entry but still get their own ordering and distances.
+
+Each entry records the version counters of the coarse cells its
+candidates depend on: the cells covering the circle out to the farthest
+salon considered. Saving or deleting a salon bumps only the counters of
+the cells it sits in, which invalidates exactly the entries that could
+have changed.
+"""
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache import bump_versions, get_versions
+from .geo import bounding_box, geohash_bounds, geohash_cell_size, geohash_encode, haversine_distance
+
+# Cell size used to track which cached responses a salon change affects.
+DEPENDENCY_PRECISION = 4
+# Responses reaching over more cells than this depend on every salon instead.
+MAX_DEPENDENCY_CELLS = 64
+
+SEQUENCE_KEY = 'nearby:version:all'
+HITS_KEY = 'nearby:stats:hits'
+MISSES_KEY = 'nearby:stats:misses'
+
+
+def _cell_key(cell):
+    return f'nearby:version:{cell}'
+
+
+def tile_for(lat, lon):
+    """
+    Return ``(tile, centre_lat, centre_lon, slack_km)`` for the cache tile
+    holding the point, where ``slack_km`` is the farthest any point of the
+    tile lies from its centre. Returns ``None`` when caching is disabled
+    (``NEARBY_CACHE_PRECISION = None``).
+    """
+    precision = getattr(settings, 'NEARBY_CACHE_PRECISION', 7)
+    if not precision:
+        return None
+    tile = geohash_encode(lat, lon, precision)
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds(tile)
+    centre_lat, centre_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    slack_km = max(haversine_distance(centre_lat, centre_lon, corner_lat, corner_lon)
+                   for corner_lat in (min_lat, max_lat) for corner_lon in (min_lon, max_lon))
+    return tile, centre_lat, centre_lon, slack_km + 1e-6
+
+
+def candidates_key(tile, **params):
+    raw = tile + '|' + '|'.join(f'{name}={params[name]}' for name in sorted(params))
+    return 'nearby:candidates:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def sequence():
+    """Current global salon write counter; pass it to :func:`store`."""
+    return get_versions([SEQUENCE_KEY])[SEQUENCE_KEY]
+
+
+def lookup(key):
+    entry = cache.get(key)
+    if entry is not None and get_versions(list(entry['versions'])) == entry['versions']:
+        _count(HITS_KEY)
+        return entry['data']
+    _count(MISSES_KEY)
+    return None
+
+
+def store(key, data, lat, lon, reach_km, seen_sequence):
+    """
+    Cache ``data`` computed around ``(lat, lon)``. ``reach_km`` is the distance
+    out to which a salon change could alter it (``None`` when any change
+    could); ``seen_sequence`` is :func:`sequence` read before it was
+    computed, so results raced by a write are not cached.
+    """
+    dependencies = _dependency_keys(lat, lon, reach_km)
+    versions = get_versions(dependencies + [SEQUENCE_KEY])
+    if versions[SEQUENCE_KEY] != seen_sequence:
+        return
+    if SEQUENCE_KEY not in dependencies:
+        del versions[SEQUENCE_KEY]
+    timeout = getattr(settings, 'NEARBY_CACHE_TIMEOUT', 300)
+    cache.set(key, {'data': data, 'versions': versions}, timeout)
+
+
+def invalidate(geohashes):
+    """Evict cached responses that depend on the cells holding ``geohashes``."""
+    cells = {geohash[:DEPENDENCY_PRECISION] for geohash in geohashes if geohash}
+    bump_versions([_cell_key(cell) for cell in cells] + [SEQUENCE_KEY])
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else None}
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _dependency_keys(lat, lon, reach_km):
+    if reach_km is None:
+        return [SEQUENCE_KEY]
+    height, width = geohash_cell_size(DEPENDENCY_PRECISION)
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, reach_km)
+    rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+    columns = sum(math.floor(high / width) - math.floor(low / width) + 1 for low, high in lon_ranges)
+    if rows * columns > MAX_DEPENDENCY_CELLS:
+        return [SEQUENCE_KEY]
+
+    cells = set()
+    for row in range(math.floor(min_lat / height), math.floor(max_lat / height) + 1):
+        cell_lat = min(max((row + 0.5) * height, -90.0), 90.0)
+        for low, high in lon_ranges:
+            for column in range(math.floor(low / width), math.floor(high / width) + 1):
+                cell_lon = min(max((column + 0.5) * width, -180.0), 180.0)
+                cells.add(geohash_encode(cell_lat, cell_lon, DEPENDENCY_PRECISION))
+    return [_cell_key(cell) for cell in sorted(cells)]
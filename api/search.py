@@ -1,34 +1,68 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
-from .models import Salon, Stylist, Service
+from .search_index import SEARCH_TYPES, match_expression, search
+from .trigram_index import fuzzy_search, trigrams
 from .serializers import SalonSerializer, StylistSerializer, ServiceSerializer
 
+SERIALIZERS = {
+    'salons': SalonSerializer,
+    'stylists': StylistSerializer,
+    'services': ServiceSerializer,
+}
+
+
 class GlobalSearchView(APIView):
+    """
+    Full-text search over salons, stylists and services. Each type is
+    ranked by relevance and paginated on its own: ``page`` and
+    ``page_size`` (max ``MAX_PAGE_SIZE``) apply to every type in ``types``.
+    With ``fuzzy=true`` names are matched by trigram similarity instead,
+    which tolerates misspellings.
+    """
+    PAGE_SIZE = 10
+    MAX_PAGE_SIZE = 50
+
     def get(self, request):
         query = request.query_params.get('q', '')
         if not query:
             return Response({'error': 'Please provide a search query.'}, status=status.HTTP_400_BAD_REQUEST)
+        fuzzy = request.query_params.get('fuzzy', '').lower() in ('1', 'true', 'yes')
+        expression = None if fuzzy else match_expression(query)
+        if not (trigrams(query) if fuzzy else expression):
+            return Response({'error': 'The search query must contain letters or digits.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        salons = Salon.objects.filter(
-            Q(name__icontains=query) | 
-            Q(address__icontains=query) | 
-            Q(description__icontains=query)
-        )
-        stylists = Stylist.objects.filter(
-            Q(name__icontains=query) | 
-            Q(specialties__icontains=query)
-        )
-        services = Service.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
-        )
-
-        results = {
-            'salons': SalonSerializer(salons, many=True).data,
-            'stylists': StylistSerializer(stylists, many=True).data,
-            'services': ServiceSerializer(services, many=True).data,
-        }
+        types = request.query_params.get('types')
+        types = [name.strip() for name in types.split(',') if name.strip()] if types else list(SEARCH_TYPES)
+        unknown = set(types) - set(SEARCH_TYPES)
+        if unknown:
+            return Response({'error': f"Unknown search types: {', '.join(sorted(unknown))}. "
+                                      f"Choose from {', '.join(SEARCH_TYPES)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = min(int(request.query_params.get('page_size', self.PAGE_SIZE)), self.MAX_PAGE_SIZE)
+            if page < 1 or page_size < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'page and page_size must be positive integers.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(results)
\ No newline at end of file
+        types = list(dict.fromkeys(types))
+        offset = (page - 1) * page_size
+        matches = fuzzy_search(query, types) if fuzzy else None
+        results = {'page': page, 'page_size': page_size}
+        for name in types:
+            if fuzzy:
+                count = len(matches[name])
+                pks = [pk for pk, score in matches[name][offset:offset + page_size]]
+                found = SEARCH_TYPES[name].model.objects.in_bulk(pks) if pks else {}
+                objects = [found[pk] for pk in pks if pk in found]
+            else:
+                count, objects = search(SEARCH_TYPES[name], expression, offset, page_size)
+            results[name] = {
+                'count': count,
+                'results': SERIALIZERS[name](objects, many=True).data,
+            }
+        return Response(results)
@@ -0,0 +1,106 @@
+"""
+SQLite FTS5 full-text index behind ``GlobalSearchView``.
+
+Each searchable model has an FTS5 table whose ``rowid`` is the model's
+primary key (created and backfilled by migration ``0009``). ``api.signals``
+rewrites a row on save and drops it on delete, inside the same transaction
+as the change. Queries go through the FTS index and are ranked with
+``bm25``, with names weighted above the longer text columns, so their cost
+follows the number of matches rather than the size of the catalogue.
+
+Bulk ``update()``/``bulk_create()`` skip signals; run ``manage.py
+rebuild_search_index`` after those.
+"""
+import re
+
+from django.db import connection
+
+from .models import Salon, Service, Stylist
+
+
+class SearchType:
+    def __init__(self, model, columns, weights):
+        self.model = model
+        self.columns = columns
+        self.weights = weights
+
+    @property
+    def table(self):
+        return f'{self.model._meta.db_table}_fts'
+
+
+# Plural name (as used in ?types= and the response) -> index definition.
+SEARCH_TYPES = {
+    'salons': SearchType(Salon, ('name', 'address', 'description'), (10.0, 2.0, 1.0)),
+    'stylists': SearchType(Stylist, ('name', 'specialties'), (10.0, 3.0)),
+    'services': SearchType(Service, ('name', 'description'), (10.0, 1.0)),
+}
+TYPES_BY_MODEL = {search_type.model: search_type for search_type in SEARCH_TYPES.values()}
+KINDS_BY_MODEL = {search_type.model: kind for kind, search_type in SEARCH_TYPES.items()}
+
+WORD = re.compile(r'\w+')
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+    Words are quoted, so operators and punctuation in user input are inert.
+    Returns ``''`` when the text has no words.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def search(search_type, expression, offset, limit):
+    """
+    Return ``(count, objects)``: the total number of matches and the
+    ``limit`` best-ranked model instances after ``offset``, in one query.
+    """
+    model = search_type.model
+    table = search_type.table
+    weights = ', '.join(map(str, search_type.weights))
+    # bm25() is only allowed in a plain full-text query, so rank in a CTE
+    # and join the model's rows to the ranked ids.
+    sql = (
+        f'WITH matches AS MATERIALIZED ('
+        f'SELECT rowid AS id, bm25({table}, {weights}) AS score FROM {table} WHERE {table} MATCH %s) '
+        f'SELECT t.*, count(*) OVER () AS search_total '
+        f'FROM matches JOIN {model._meta.db_table} t ON t.{model._meta.pk.column} = matches.id '
+        f'ORDER BY matches.score, matches.id '
+        f'LIMIT %s OFFSET %s'
+    )
+    objects = list(model.objects.raw(sql, [expression, limit, offset]))
+    if objects:
+        return objects[0].search_total, objects
+    if offset:
+        # Past the last page: the window count came back with no rows.
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {table} WHERE {table} MATCH %s', [expression])
+            return cursor.fetchone()[0], []
+    return 0, []
+
+
+def index_instance(instance):
+    search_type = TYPES_BY_MODEL[type(instance)]
+    columns = ', '.join(search_type.columns)
+    placeholders = ', '.join(['%s'] * (len(search_type.columns) + 1))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {search_type.table} WHERE rowid = %s', [instance.pk])
+        cursor.execute(f'INSERT INTO {search_type.table} (rowid, {columns}) VALUES ({placeholders})',
+                       [instance.pk] + [getattr(instance, column) or '' for column in search_type.columns])
+
+
+def remove_instance(instance):
+    search_type = TYPES_BY_MODEL[type(instance)]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {search_type.table} WHERE rowid = %s', [instance.pk])
+
+
+def rebuild():
+    """Repopulate every index from its table."""
+    with connection.cursor() as cursor:
+        for search_type in SEARCH_TYPES.values():
+            columns = ', '.join(search_type.columns)
+            cursor.execute(f'DELETE FROM {search_type.table}')
+            cursor.execute(f'INSERT INTO {search_type.table} (rowid, {columns}) '
+                           f'SELECT {search_type.model._meta.pk.column}, {columns} '
+                           f'FROM {search_type.model._meta.db_table}')
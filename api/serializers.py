@@ -1,13 +1,13 @@
+from datetime import timedelta
+
 from rest_framework import serializers
-from api.models import Salon, Stylist, Service, Promotion
-from booking.models import Appointment
-from content.models import Review, Blog
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
-from .views import haversine_distance
-from rest_framework import serializers
+
+from authentication.models import User
 from api.models import Salon, Stylist, Service, Promotion
-from booking.models import Appointment
+from booking.models import Appointment, SlotHold
 from content.models import Review, Blog
+from utils.serialization import DynamicFieldsMixin
 
 class SalonSerializer(serializers.ModelSerializer):
     distance = serializers.SerializerMethodField()
@@ -19,10 +19,11 @@ class SalonSerializer(serializers.ModelSerializer):
     def get_distance(self, obj):
         return getattr(obj, 'distance', None)
     
-class StylistSerializer(serializers.ModelSerializer):
+class StylistSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Stylist
         fields = '__all__'
+        expandable_fields = {'salon': SalonSerializer, 'workplace': SalonSerializer}
 
     def validate(self, data):
         user = data.get('user')
@@ -30,10 +31,11 @@ class StylistSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("This user is already associated with another stylist profile.")
         return data
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Service
         fields = '__all__'
+        expandable_fields = {'salon': SalonSerializer}
 
 class AppointmentSerializer(serializers.ModelSerializer):
     services = serializers.PrimaryKeyRelatedField(many=True, queryset=Service.objects.all(), required=False)
@@ -48,17 +50,68 @@ class AppointmentSerializer(serializers.ModelSerializer):
         representation['services'] = [{'id': service.id, 'name': service.name} for service in instance.services.all()]
         return representation
     
-class ReviewSerializer(serializers.ModelSerializer):
+class RecurringAppointmentSerializer(serializers.Serializer):
+    """
+    A batch of appointments sharing one stylist and time of day, given as
+    explicit ``dates`` or as ``first_date`` repeated every ``interval_days``
+    for ``occurrences`` bookings.
+    """
+    MAX_OCCURRENCES = 52
+
+    customer = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+    stylist = serializers.PrimaryKeyRelatedField(queryset=Stylist.objects.all())
+    salon = serializers.PrimaryKeyRelatedField(queryset=Salon.objects.all())
+    services = serializers.PrimaryKeyRelatedField(many=True, queryset=Service.objects.all(), required=False)
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    dates = serializers.ListField(child=serializers.DateField(), required=False, max_length=MAX_OCCURRENCES)
+    first_date = serializers.DateField(required=False)
+    interval_days = serializers.IntegerField(required=False, min_value=1, default=7)
+    occurrences = serializers.IntegerField(required=False, min_value=1, max_value=MAX_OCCURRENCES)
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        if data.get('dates'):
+            data['dates'] = sorted(set(data['dates']))
+        elif data.get('first_date') and data.get('occurrences'):
+            step = timedelta(days=data['interval_days'])
+            data['dates'] = [data['first_date'] + step * n for n in range(data['occurrences'])]
+        else:
+            raise serializers.ValidationError("Provide either dates or first_date and occurrences.")
+        return data
+
+class SlotHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SlotHold
+        fields = ['token', 'stylist', 'date', 'start_time', 'end_time', 'expires_at']
+        read_only_fields = ['token', 'expires_at']
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        return data
+    
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
+        expandable_fields = {'appointment': AppointmentSerializer}
+
+class BlogAuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username']
 
-class BlogSerializer(serializers.ModelSerializer):
+class BlogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Blog
         fields = '__all__'
+        expandable_fields = {'author': BlogAuthorSerializer}
 
-class PromotionSerializer(serializers.ModelSerializer):
+class PromotionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Promotion
         fields = '__all__'
\ No newline at end of file
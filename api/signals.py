@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from utils.conditional import bump_table_versions
+from . import nearby_cache, search_index, trigram_index
+from .models import Promotion, Salon, Service, Stylist
+from .nearby import invalidate_salon_snapshot
+
+
+@receiver(pre_save, sender=Salon)
+def remember_salon_location(sender, instance, **kwargs):
+    previous = Salon.objects.filter(pk=instance.pk).values_list('geohash', flat=True).first() if instance.pk else None
+    instance._previous_geohash = previous or ''
+
+
+@receiver([post_save, post_delete], sender=Salon)
+def salon_location_changed(sender, instance, **kwargs):
+    invalidate_salon_snapshot()
+    geohashes = [instance.geohash, getattr(instance, '_previous_geohash', '')]
+    transaction.on_commit(lambda: nearby_cache.invalidate(geohashes))
+
+
+@receiver([post_save, post_delete], sender=Salon)
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=Promotion)
+def catalogue_changed(sender, **kwargs):
+    bump_table_versions([sender])
+
+
+@receiver(post_save, sender=Salon)
+@receiver(post_save, sender=Stylist)
+@receiver(post_save, sender=Service)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    columns = search_index.TYPES_BY_MODEL[sender].columns
+    if update_fields is None or set(update_fields) & set(columns):
+        search_index.index_instance(instance)
+    if update_fields is None or 'name' in update_fields:
+        kind, pk, name = search_index.KINDS_BY_MODEL[sender], instance.pk, instance.name
+        transaction.on_commit(lambda: trigram_index.index.update(kind, pk, name))
+
+
+@receiver(post_delete, sender=Salon)
+@receiver(post_delete, sender=Stylist)
+@receiver(post_delete, sender=Service)
+def remove_from_search_index(sender, instance, **kwargs):
+    search_index.remove_instance(instance)
+    kind, pk = search_index.KINDS_BY_MODEL[sender], instance.pk
+    transaction.on_commit(lambda: trigram_index.index.remove(kind, pk))
@@ -0,0 +1,905 @@
+import math
+import random
+from datetime import date, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from content.models import Blog, Review
+from coupons.models import Coupon
+from utils.serialization import compile_values_serializer
+from utils.testing import QueryBudgetMixin
+
+from .geo import bounding_box, geohash_encode, haversine_distance, haversine_many, haversine_matrix
+from booking.models import Appointment, SlotHold
+from .models import Promotion, Salon, Service, Stylist
+from .urls import router
+from .views import CLUSTER_MAX_GRID, CLUSTER_MAX_SALONS
+from .nearby import nearest_salons
+from . import trigram_index
+from .trigram_index import TrigramIndex
+
+
+SALON_DEFAULTS = {'address': '1 Test St', 'city': 'Test City', 'phone': '+1234567890'}
+STYLIST_DEFAULTS = {'phone': '+1234567890', 'specialties': 'Cuts', 'years_of_experience': 3}
+
+
+def build_salon(name, **fields):
+    """An unsaved salon with the test address, city and phone unless overridden."""
+    return Salon(name=name, **{**SALON_DEFAULTS, **fields})
+
+
+def make_salon(name, **fields):
+    return Salon.objects.create(name=name, **{**SALON_DEFAULTS, **fields})
+
+
+def make_stylist(salon, name='Sam', **fields):
+    return Stylist.objects.create(name=name, salon=salon, **{**STYLIST_DEFAULTS, **fields})
+
+
+def destination(lat, lon, bearing, distance_km):
+    lat, lon, bearing = map(math.radians, (lat, lon, bearing))
+    angular = distance_km / 6371
+    dest_lat = math.asin(math.sin(lat) * math.cos(angular) + math.cos(lat) * math.sin(angular) * math.cos(bearing))
+    dest_lon = lon + math.atan2(math.sin(bearing) * math.sin(angular) * math.cos(lat),
+                                math.cos(angular) - math.sin(lat) * math.sin(dest_lat))
+    return math.degrees(dest_lat), (math.degrees(dest_lon) + 540) % 360 - 180
+
+
+@override_settings(NEARBY_CACHE_PRECISION=None)
+class NearbySalonTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('salon-nearby')
+        rng = random.Random(7)
+        for i in range(60):
+            make_salon(f'Salon {i}', latitude=rng.uniform(40.0, 41.5), longitude=rng.uniform(-75.0, -73.0))
+
+    def brute_force(self, lat, lon, limit):
+        salons = Salon.objects.exclude(latitude=None).exclude(longitude=None)
+        ranked = sorted(salons, key=lambda s: (haversine_distance(lat, lon, s.latitude, s.longitude), s.pk))
+        return [salon.pk for salon in ranked[:limit]]
+
+    def test_geohash_kept_in_sync_on_save(self):
+        salon = Salon.objects.first()
+        salon.latitude, salon.longitude = 51.5074, -0.1278
+        salon.save()
+        salon.refresh_from_db()
+        self.assertEqual(salon.geohash, geohash_encode(51.5074, -0.1278))
+
+        salon.latitude = None
+        salon.save()
+        salon.refresh_from_db()
+        self.assertEqual(salon.geohash, '')
+
+    def test_matches_full_scan_ordering(self):
+        for lat, lon in [(40.7128, -74.0060), (40.0, -75.0), (41.4, -73.1), (34.05, -118.24), (-33.87, 151.21)]:
+            for limit in (1, 6, 20):
+                result = nearest_salons(lat, lon, limit)
+                self.assertEqual([salon.pk for salon in result], self.brute_force(lat, lon, limit))
+
+    def test_nearby_endpoint(self):
+        response = self.client.get(self.url, {'lat': 40.7128, 'lon': -74.0060})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([salon['id'] for salon in response.data], self.brute_force(40.7128, -74.0060, 6))
+        distances = [salon['distance'] for salon in response.data]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_radius_and_cursor_pages(self):
+        lat, lon = 40.7128, -74.0060
+        expected = [pk for pk in self.brute_force(lat, lon, 60)
+                    if haversine_distance(lat, lon, *Salon.objects.values_list('latitude', 'longitude').get(pk=pk)) <= 50]
+        self.assertTrue(0 < len(expected) < 60)
+
+        for radius in (None, 50):
+            params = {'lat': lat, 'lon': lon, 'limit': 7}
+            if radius is not None:
+                params['radius_km'] = radius
+            seen = []
+            response = self.client.get(self.url, params)
+            while True:
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertLessEqual(len(response.data['results']), 7)
+                seen.extend(salon['id'] for salon in response.data['results'])
+                if response.data['next'] is None:
+                    break
+                response = self.client.get(response.data['next'])
+            self.assertEqual(seen, expected if radius else self.brute_force(lat, lon, 60))
+
+    def test_nearby_rejects_bad_paging_params(self):
+        for params in ({'limit': 0}, {'limit': 'x'}, {'radius_km': -1}, {'cursor': 'not-a-cursor'}):
+            response = self.client.get(self.url, {'lat': 40.7128, 'lon': -74.0060, **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nearby_requires_coordinates(self):
+        response = self.client.get(self.url, {'lat': 40.7128})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NearbyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('salon-nearby')
+        rng = random.Random(11)
+        self.salons = [
+            make_salon(f'Salon {i}', latitude=rng.uniform(40.6, 40.8), longitude=rng.uniform(-74.1, -73.9))
+            for i in range(30)
+        ]
+
+    def get(self, lat=40.7128, lon=-74.0060):
+        response = self.client.get(self.url, {'lat': lat, 'lon': lon})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_requests_in_same_tile_share_response(self):
+        first = self.get()
+        second = self.get(40.71281, -74.00601)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual([s['id'] for s in first.data], [s['id'] for s in second.data])
+
+    def test_shared_tile_is_ranked_from_exact_position(self):
+        # Both salons sit in the same cache tile, about 89m apart.
+        here = make_salon('Here', latitude=40.71, longitude=-74.0)
+        there = make_salon('There', latitude=40.7108, longitude=-74.0)
+        self.client.get(self.url, {'lat': there.latitude, 'lon': there.longitude, 'limit': 1})
+        response = self.client.get(self.url, {'lat': here.latitude, 'lon': here.longitude, 'limit': 1})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['id'], here.pk)
+        self.assertEqual(response.data['results'][0]['distance'], 0.0)
+        self.assertIn('lat=40.71&', response.data['next'])
+        second = self.client.get(response.data['next'])
+        self.assertEqual(second.data['results'][0]['id'], there.pk)
+        self.assertAlmostEqual(second.data['results'][0]['distance'], 0.089, places=3)
+
+    def test_nearby_change_evicts_tile(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_salon('New', latitude=40.7129, longitude=-74.0061)
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['name'], 'New')
+
+    def test_moving_salon_away_evicts_tile(self):
+        nearest = self.get().data[0]
+        salon = Salon.objects.get(pk=nearest['id'])
+        with self.captureOnCommitCallbacks(execute=True):
+            salon.latitude, salon.longitude = -33.87, 151.21
+            salon.save()
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotEqual(response.data[0]['id'], nearest['id'])
+
+    def test_distant_change_keeps_tile(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_salon('Far', latitude=-33.87, longitude=151.21)
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+
+    def test_stats_are_staff_only(self):
+        self.get()
+        self.get()
+        stats_url = reverse('salon-nearby-cache-stats')
+        user = User.objects.create_user(username='stats', password='pass12345')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(stats_url)
+        self.assertEqual(response.data['hits'], 1)
+        self.assertEqual(response.data['misses'], 1)
+
+
+class SalonClusterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('salon-clusters')
+        self.viewport = {'min_lat': 40.0, 'min_lon': -75.0, 'max_lat': 42.0, 'max_lon': -73.0}
+        for i in range(10):
+            make_salon(f'Manhattan {i}', city='New York', latitude=40.75 + i * 0.001, longitude=-73.99 + i * 0.001)
+        for i in range(5):
+            make_salon(f'Trenton {i}', city='Trenton', latitude=40.22 + i * 0.001, longitude=-74.76 + i * 0.001)
+        make_salon('Outside', city='Boston', latitude=42.36, longitude=-71.06)
+
+    def test_low_zoom_returns_clusters(self):
+        response = self.client.get(self.url, {**self.viewport, 'zoom': 8})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('salons', response.data)
+        counts = sorted(cluster['count'] for cluster in response.data['clusters'])
+        self.assertEqual(counts, [5, 10])
+        big = max(response.data['clusters'], key=lambda cluster: cluster['count'])
+        self.assertAlmostEqual(big['centroid']['latitude'], 40.7545)
+        self.assertEqual(big['bounds']['min_lat'], 40.75)
+
+    def test_high_zoom_returns_salons(self):
+        viewport = {'min_lat': 40.74, 'min_lon': -74.0, 'max_lat': 40.76, 'max_lon': -73.98}
+        response = self.client.get(self.url, {**viewport, 'zoom': 16})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['salons']), 10)
+
+    def test_high_zoom_clusters_crowded_viewport(self):
+        Salon.objects.bulk_create(
+            build_salon(f'Crowd {i}', city='New York', latitude=40.7, longitude=-74.0)
+            for i in range(CLUSTER_MAX_SALONS)
+        )
+        response = self.client.get(self.url, {**self.viewport, 'zoom': 16})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('salons', response.data)
+        counts = sorted(cluster['count'] for cluster in response.data['clusters'])
+        self.assertGreaterEqual(counts[-1], CLUSTER_MAX_SALONS)
+        self.assertEqual(sum(counts), CLUSTER_MAX_SALONS + 15)
+
+    def test_wide_viewport_uses_coarser_grid(self):
+        rng = random.Random(5)
+        Salon.objects.bulk_create(
+            build_salon(f'Spread {i}', city='Anywhere', latitude=rng.uniform(-80, 80),
+                        longitude=rng.uniform(-180, 180))
+            for i in range(800)
+        )
+        world = {'min_lat': -90, 'min_lon': -180, 'max_lat': 90, 'max_lon': 180}
+        response = self.client.get(self.url, {**world, 'zoom': 15})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(response.data['clusters']), (CLUSTER_MAX_GRID + 1) ** 2)
+        self.assertEqual(sum(cluster['count'] for cluster in response.data['clusters']), 816)
+        self.assertLess(len(response.content), 64 * 1024)
+
+    def test_invalid_viewport(self):
+        response = self.client.get(self.url, {**self.viewport, 'zoom': 30})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'zoom': 5})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DistanceKernelTests(TestCase):
+    def test_bounding_box_contains_circle(self):
+        for lat, lon in [(40.7, -74.0), (10.0, 179.9), (-10.0, -179.9), (89.5, 0.0)]:
+            min_lat, max_lat, lon_ranges = bounding_box(lat, lon, 100)
+            for bearing in range(0, 360, 15):
+                point_lat, point_lon = destination(lat, lon, bearing, 99.9)
+                self.assertTrue(min_lat <= point_lat <= max_lat)
+                self.assertTrue(any(low <= point_lon <= high for low, high in lon_ranges))
+
+    def test_matches_scalar_haversine(self):
+        rng = np.random.default_rng(3)
+        lats = rng.uniform(-80, 80, 50)
+        lons = rng.uniform(-180, 180, 50)
+        origins = [(40.7128, -74.0060), (-33.87, 151.21)]
+
+        matrix = haversine_matrix([o[0] for o in origins], [o[1] for o in origins], lats, lons)
+        self.assertEqual(matrix.shape, (2, 50))
+        for row, (lat, lon) in zip(matrix, origins):
+            expected = [haversine_distance(lat, lon, a, b) for a, b in zip(lats, lons)]
+            np.testing.assert_allclose(row, expected, rtol=1e-9)
+        np.testing.assert_allclose(haversine_many(*origins[0], lats, lons), matrix[0])
+
+    def test_snapshot_refreshed_after_salon_changes(self):
+        salon = make_salon('Remote', latitude=-77.85, longitude=166.67)
+        self.assertEqual(nearest_salons(-77.8, 166.6, 1), [salon])
+        salon.delete()
+        self.assertEqual(nearest_salons(-77.8, 166.6, 1), [])
+
+
+class AvailableSlotsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='booker', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.salon = make_salon('Slots')
+        self.stylist = make_stylist(self.salon)
+        self.cut = Service.objects.create(name='Cut', description='', price=20, duration=45, salon=self.salon)
+        self.colour = Service.objects.create(name='Colour', description='', price=60, duration=60, salon=self.salon)
+        self.day = date(2030, 1, 7)
+        self.url = reverse('stylist-available-slots', args=[self.stylist.pk])
+
+    def book(self, start, end, status='BOOKED'):
+        return Appointment.objects.create(customer=self.user, stylist=self.stylist, salon=self.salon,
+                                          date=self.day, start_time=start, end_time=end,
+                                          status=status, total_price=20)
+
+    def test_overlapping_appointments_block_slots(self):
+        self.book(time(9, 15), time(10, 30))
+        self.book(time(12, 0), time(13, 0), status='CANCELLED')
+        response = self.client.get(self.url, {'date': '2030-01-07'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[:2], ['10:30', '11:00'])
+        self.assertIn('12:00', response.data)
+
+    def test_live_holds_block_slots(self):
+        other = User.objects.create_user(username='slot-holder', password='pass12345')
+        for start, expires_in in ((time(9, 0), 10), (time(11, 0), -1)):
+            SlotHold.objects.create(stylist=self.stylist, customer=other, date=self.day, start_time=start,
+                                    end_time=time(start.hour + 1, 0),
+                                    expires_at=timezone.now() + timedelta(minutes=expires_in))
+        response = self.client.get(self.url, {'date': '2030-01-07'})
+        self.assertEqual(response.data[:3], ['10:00', '10:30', '11:00'])
+
+        grid = self.client.get(reverse('salon-availability', args=[self.salon.pk]), {'start': '2030-01-07', 'days': 1})
+        self.assertEqual(grid.data['stylists'][0]['availability']['2030-01-07'][:3], ['10:00', '10:30', '11:00'])
+
+    def test_service_durations_are_summed(self):
+        self.book(time(11, 0), time(12, 0))
+        response = self.client.get(self.url, {'date': '2030-01-07', 'services': f'{self.cut.pk},{self.colour.pk}'})
+        self.assertEqual(response.data, ['09:00', '12:00', '12:30', '13:00', '13:30', '14:00', '14:30', '15:00'])
+
+    def test_invalid_parameters(self):
+        for params in ({'date': 'tomorrow'}, {'duration': '-5'}, {'services': '999999'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SalonAvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='grid', password='pass12345')
+        self.salon = make_salon('Grid')
+        self.stylists = [make_stylist(self.salon, f'Stylist {i}') for i in range(3)]
+        self.day = date(2030, 1, 7)
+        Appointment.objects.create(customer=self.user, stylist=self.stylists[1], salon=self.salon,
+                                   date=date(2030, 1, 8), start_time=time(9, 0), end_time=time(12, 0),
+                                   total_price=20)
+        self.url = reverse('salon-availability', args=[self.salon.pk])
+
+    def test_grid_for_all_stylists(self):
+        # Salon, stylists, appointments and live holds.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {'start': '2030-01-07', 'days': 3, 'duration': 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([stylist['id'] for stylist in response.data['stylists']], [s.pk for s in self.stylists])
+        busy = response.data['stylists'][1]['availability']
+        self.assertEqual(list(busy), ['2030-01-07', '2030-01-08', '2030-01-09'])
+        self.assertEqual(busy['2030-01-08'][0], '12:00')
+        self.assertEqual(len(busy['2030-01-07']), 15)
+
+    def test_warm_grid_skips_appointment_query(self):
+        self.client.get(self.url, {'start': '2030-01-07', 'days': 3})
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'start': '2030-01-07', 'days': 3})
+        self.assertEqual(response.data['stylists'][1]['availability']['2030-01-08'][0], '12:00')
+
+    def test_next_available(self):
+        url = reverse('salon-next_available', args=[self.salon.pk])
+        response = self.client.get(url, {'duration': 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(response.data['stylist']['id'], [s.pk for s in self.stylists])
+        self.assertEqual(response.data['duration'], 60)
+
+        response = self.client.get(url, {'duration': 60 * 9})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_days_are_bounded(self):
+        response = self.client.get(self.url, {'days': 400})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentBookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='hold-customer', password='pass12345')
+        self.other = User.objects.create_user(username='hold-other', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.salon = make_salon('Booked')
+        self.stylist = make_stylist(self.salon)
+        Appointment.objects.create(customer=self.other, stylist=self.stylist, salon=self.salon,
+                                   date=date(2030, 1, 7), start_time=time(10, 0), end_time=time(11, 0),
+                                   total_price=20)
+
+    def book(self, start, end, **extra):
+        return self.client.post(reverse('appointment-list'), {
+            'customer': self.user.pk, 'stylist': self.stylist.pk, 'salon': self.salon.pk,
+            'date': '2030-01-07', 'start_time': start, 'end_time': end, 'total_price': 20, **extra,
+        })
+
+    def test_overlap_with_different_start_is_rejected(self):
+        response = self.book('10:30', '11:30')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.book('11:00', '11:30').status_code, status.HTTP_201_CREATED)
+
+    def test_cancelled_appointment_frees_slot(self):
+        Appointment.objects.update(status='CANCELLED')
+        self.assertEqual(self.book('10:00', '11:00').status_code, status.HTTP_201_CREATED)
+
+    def test_reschedule_into_overlap_is_rejected(self):
+        appointment_id = self.book('12:00', '13:00').data['id']
+        url = reverse('appointment-detail', args=[appointment_id])
+        self.assertEqual(self.client.patch(url, {'start_time': '10:45'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.patch(url, {'start_time': '12:30', 'end_time': '13:30'}).status_code,
+                         status.HTTP_200_OK)
+
+    def test_confirming_cancelled_appointment_rechecks_slot(self):
+        appointment = Appointment.objects.get(stylist=self.stylist)
+        appointment.status = 'CANCELLED'
+        appointment.save()
+        self.assertEqual(self.book('10:30', '11:30').status_code, status.HTTP_201_CREATED)
+        url = reverse('appointment-confirm', args=[appointment.pk])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'CANCELLED')
+
+        Appointment.objects.filter(stylist=self.stylist).exclude(pk=appointment.pk).delete()
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'CONFIRMED')
+
+    def test_reschedule_through_booking_app_is_checked(self):
+        appointment_id = self.book('12:00', '13:00').data['id']
+        url = reverse('booking:appointment-detail', args=[appointment_id])
+        response = self.client.patch(url, {'start_time': '10:30', 'end_time': '11:30'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Appointment.objects.get(pk=appointment_id).start_time, time(12, 0))
+        self.assertEqual(self.client.patch(url, {'start_time': '11:00'}).status_code, status.HTTP_200_OK)
+
+    def test_booking_app_mounts_only_appointments(self):
+        self.assertEqual(self.client.get('/booking/reviews/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete('/booking/reviews/1/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_hold_blocks_others_until_used(self):
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        response = other_client.post(reverse('slothold-list'), {
+            'stylist': self.stylist.pk, 'date': '2030-01-07', 'start_time': '14:00', 'end_time': '15:00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        token = response.data['token']
+
+        self.assertEqual(self.book('14:30', '15:00').status_code, status.HTTP_400_BAD_REQUEST)
+        conflicting = other_client.post(reverse('slothold-list'), {
+            'stylist': self.stylist.pk, 'date': '2030-01-07', 'start_time': '14:30', 'end_time': '15:30'})
+        self.assertEqual(conflicting.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Another customer's token is no good, and leaves the hold in place.
+        self.assertEqual(self.book('14:00', '15:00', hold=token).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(SlotHold.objects.filter(token=token).exists())
+
+        response = other_client.post(reverse('appointment-list'), {
+            'customer': self.other.pk, 'stylist': self.stylist.pk, 'salon': self.salon.pk, 'date': '2030-01-07',
+            'start_time': '14:00', 'end_time': '15:00', 'total_price': 20, 'hold': token})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_hold_must_cover_the_booking(self):
+        token = self.client.post(reverse('slothold-list'), {
+            'stylist': self.stylist.pk, 'date': '2030-01-07', 'start_time': '14:00', 'end_time': '15:00'}).data['token']
+        for start, end in (('16:00', '17:00'), ('14:30', '15:30')):
+            with self.subTest(start=start):
+                self.assertEqual(self.book(start, end, hold=token).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.book('12:00', '13:00', hold='not-a-uuid').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(SlotHold.objects.filter(token=token).exists())
+        self.assertEqual(self.book('14:15', '15:00', hold=token).status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SlotHold.objects.exists())
+
+    @override_settings(SLOT_HOLD_MAX_PER_CUSTOMER=2)
+    def test_live_holds_per_customer_are_capped(self):
+        def hold(start, end):
+            return self.client.post(reverse('slothold-list'), {
+                'stylist': self.stylist.pk, 'date': '2030-01-07', 'start_time': start, 'end_time': end})
+        self.assertEqual(hold('12:00', '13:00').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(hold('13:00', '14:00').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(hold('14:00', '15:00').status_code, status.HTTP_400_BAD_REQUEST)
+        SlotHold.objects.filter(start_time=time(12, 0)).update(expires_at=timezone.now())
+        self.assertEqual(hold('14:00', '15:00').status_code, status.HTTP_201_CREATED)
+
+    def test_expired_hold_is_ignored(self):
+        SlotHold.objects.create(stylist=self.stylist, customer=self.other, date=date(2030, 1, 7),
+                                start_time=time(14, 0), end_time=time(15, 0),
+                                expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.book('14:00', '15:00').status_code, status.HTTP_201_CREATED)
+
+    def test_recurring_booking_reports_conflicts(self):
+        service = Service.objects.create(name='Cut', description='', price=20, duration=60, salon=self.salon)
+        payload = {
+            'customer': self.user.pk, 'stylist': self.stylist.pk, 'salon': self.salon.pk,
+            'services': [service.pk], 'start_time': '10:00', 'end_time': '11:00', 'total_price': 20,
+            'first_date': '2029-12-24', 'interval_days': 7, 'occurrences': 4,
+        }
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(13):
+            response = self.client.post(reverse('appointment-recurring'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([a['date'] for a in response.data['created']], ['2029-12-24', '2029-12-31', '2030-01-14'])
+        self.assertEqual(response.data['created'][0]['services'], [{'id': service.pk, 'name': 'Cut'}])
+        self.assertEqual([c['date'] for c in response.data['conflicts']], [date(2030, 1, 7)])
+
+        response = self.client.post(reverse('appointment-recurring'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['conflicts']), 4)
+        self.assertEqual(self.client.get(reverse('stylist-available-slots', args=[self.stylist.pk]),
+                                         {'date': '2030-01-14'}).data[:3], ['09:00', '09:30', '11:00'])
+
+
+class AppointmentPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='pager', password='pass12345')
+        self.client.force_authenticate(self.user)
+        salon = make_salon('Pages')
+        stylist = make_stylist(salon)
+        self.appointments = [
+            Appointment.objects.create(customer=self.user, stylist=stylist, salon=salon, date=date(2030, 1, day),
+                                       start_time=time(9, 0), end_time=time(10, 0), total_price=20)
+            for day in range(1, 26)
+        ]
+
+    def walk(self, url):
+        seen, pages = [], []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen += [appointment['id'] for appointment in response.data['results']]
+            pages.append(len(queries))
+            url = response.data['next']
+        return seen, pages
+
+    def test_cursor_pages_cover_everything_once(self):
+        all_ids = list(Appointment.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        seen, pages = self.walk(reverse('appointment-list') + '?page_size=10')
+        self.assertEqual(seen, all_ids)
+        # The last page is shorter, but the first two cost the same.
+        self.assertEqual(pages[0], pages[1])
+
+    def test_booking_list_is_scoped_and_paginated(self):
+        seen, _ = self.walk(reverse('booking:appointment-list-create') + '?page_size=7')
+        self.assertEqual(sorted(seen), sorted(a.pk for a in self.appointments))
+
+
+class AppointmentQueryCountTests(TestCase):
+    """Appointment lists must cost the same number of queries for any page size."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='counted', password='pass12345')
+        self.client.force_authenticate(self.user)
+        salon = make_salon('Counted')
+        self.stylist = make_stylist(salon)
+        services = [Service.objects.create(name=f'Service {n}', description='', price=20, duration=30, salon=salon)
+                    for n in range(3)]
+        for day in range(1, 31):
+            appointment = Appointment.objects.create(customer=self.user, stylist=self.stylist, salon=salon,
+                                                     date=date(2030, 1, day), start_time=time(9, 0),
+                                                     end_time=time(10, 0), total_price=20)
+            appointment.services.set(services[:day % 3 + 1])
+
+    def test_appointment_list(self):
+        # Page of appointments, then one query for all their services.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('appointment-list'), {'page_size': 30})
+        self.assertEqual(len(response.data['results']), 30)
+        self.assertTrue(all(appointment['services'] for appointment in response.data['results']))
+
+    def test_stylist_appointments(self):
+        # Stylist, appointments, services.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('stylist-appointments', args=[self.stylist.pk]))
+        self.assertEqual(len(response.data), 30)
+
+    def test_booking_appointment_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('booking:appointment-list-create'), {'page_size': 30})
+        self.assertEqual(len(response.data['results']), 30)
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Every router in api/urls.py, plus global search, under a query ceiling
+    with several rows per table, so an N+1 regression fails here.
+    """
+    # Router prefix -> queries allowed for its list (or report) GETs.
+    BUDGETS = {
+        'salons': 2,
+        'stylists': 2,
+        'services': 2,
+        'appointments': 2,
+        'holds': 1,
+        'reviews': 2,
+        'blogs': 2,
+        'reports': 1,
+        'promotions': 2,
+        'coupons': 2,
+    }
+    REPORT_ACTIONS = ['report-salon-report', 'report-stylist-report', 'report-appointment-report']
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='budget-admin', password='pass12345', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        for n in range(5):
+            salon = make_salon(f'Budget {n}')
+            stylist = make_stylist(salon, f'Stylist {n}')
+            service = Service.objects.create(name=f'Cut {n}', description='', price=20, duration=30, salon=salon)
+            appointment = Appointment.objects.create(customer=self.admin, stylist=stylist, salon=salon,
+                                                     date=date(2030, 1, n + 1), start_time=time(9, 0),
+                                                     end_time=time(10, 0), total_price=20)
+            appointment.services.set([service])
+            Review.objects.create(appointment=appointment, rating=5, comment='Great')
+            Blog.objects.create(title=f'Post {n}', content='...', author=self.admin)
+            Promotion.objects.create(title=f'Promo {n}', description='', discount_percentage=10,
+                                     valid_until=timezone.now() + timedelta(days=7))
+            Coupon.objects.create(code=f'CODE{n}', description='', discount_type='fixed', discount_value=5,
+                                  start_date=timezone.now(), end_date=timezone.now() + timedelta(days=7))
+
+    def test_every_router_has_a_budget(self):
+        self.assertEqual(sorted(prefix for prefix, _, _ in router.registry), sorted(self.BUDGETS))
+
+    def test_router_lists_stay_within_budget(self):
+        for prefix, viewset, basename in router.registry:
+            with self.subTest(prefix):
+                names = self.REPORT_ACTIONS if prefix == 'reports' else [f'{basename}-list']
+                for name in names:
+                    self.assertWithinQueryBudget(self.client, reverse(name), self.BUDGETS[prefix])
+
+    def test_global_search_within_budget(self):
+        response = self.assertWithinQueryBudget(self.client, reverse('global-search'), 3, q='Budget')
+        self.assertEqual(response.data['salons']['count'], 5)
+
+
+class FastListSerializationTests(TestCase):
+    """The .values() list path must render byte-for-byte what the serializers do."""
+
+    def setUp(self):
+        self.client = APIClient()
+        owner = User.objects.create_user(username='fast-owner', password='pass12345')
+        self.client.force_authenticate(owner)
+        for n in range(12):
+            salon = make_salon(f'Fast {n}', address=f'{n} Test St', latitude=None if n % 3 else 40.0 + n / 7,
+                               longitude=-73.5 - n / 9)
+            make_stylist(salon, f'Stylist {n}', specialties='Cuts, colour', years_of_experience=n,
+                         workplace=salon if n % 2 else None, email=f's{n}@example.com' if n % 4 else None,
+                         user=owner if n == 5 else None)
+            Service.objects.create(name=f'Service {n}', description='Långt — "quoted"', price=f'{n * 7.5:.2f}',
+                                   duration=15 * (n + 1), salon=salon)
+            Promotion.objects.create(title=f'Promo {n}', description='', discount_percentage=n,
+                                     valid_until=timezone.now() + timedelta(days=n, microseconds=n * 1013))
+
+    def assertSameBytes(self, url, **params):
+        fast = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_catalogue_lists_are_identical(self):
+        for name in ('salon-list', 'service-list', 'stylist-list', 'promotion-list'):
+            with self.subTest(name):
+                self.assertSameBytes(reverse(name))
+                self.assertSameBytes(reverse(name), page=2)
+
+    def test_filters_and_ordering_are_applied(self):
+        self.assertSameBytes(reverse('service-list'), ordering='-price', search='Service 1')
+        self.assertSameBytes(reverse('stylist-list'), ordering='years_of_experience', salon=Salon.objects.last().pk)
+
+    def test_list_query_count_unchanged(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('stylist-list'))
+
+
+class SparseFieldsetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='sparse-admin', password='pass12345', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        for n in range(4):
+            salon = make_salon(f'Sparse {n}')
+            stylist = make_stylist(salon, f'Stylist {n}', years_of_experience=n, workplace=salon if n % 2 else None)
+            service = Service.objects.create(name=f'Cut {n}', description='long ' * 50, price=20, duration=30,
+                                             salon=salon)
+            appointment = Appointment.objects.create(customer=self.admin, stylist=stylist, salon=salon,
+                                                     date=date(2030, 1, n + 1), start_time=time(9, 0),
+                                                     end_time=time(10, 0), total_price=20)
+            appointment.services.set([service])
+            Review.objects.create(appointment=appointment, rating=5, comment='Great')
+            Blog.objects.create(title=f'Post {n}', content='...' * 100, author=self.admin)
+
+    def test_fields_limits_output_and_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('blog-list'), {'fields': 'id,title,nonsense'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0].keys(), {'id', 'title'})
+        self.assertNotIn('"content"', ctx.captured_queries[-1]['sql'])
+
+    def test_fast_list_honours_fields(self):
+        response = self.client.get(reverse('service-list'), {'fields': 'name,price'})
+        self.assertEqual(list(response.data['results'][0]), ['name', 'price'])
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(reverse('service-list'), {'fields': 'name,price'})
+        self.assertEqual(response.content, slow.content)
+
+    def test_unknown_fields_share_compiled_serializer(self):
+        self.client.get(reverse('service-list'), {'fields': 'name,price'})
+        compiled = compile_values_serializer.cache_info().currsize
+        for junk in ('a', 'b', 'c'):
+            response = self.client.get(reverse('service-list'), {'fields': f'price,name,{junk}'})
+            self.assertEqual(list(response.data['results'][0]), ['name', 'price'])
+        self.assertEqual(compile_values_serializer.cache_info().currsize, compiled)
+
+    def test_expand_embeds_relation_without_extra_queries(self):
+        response = self.assertWithinQueryBudget(self.client, reverse('stylist-list'), 2,
+                                                expand='salon,workplace', search='Stylist ')
+        stylists = {stylist['name']: stylist for stylist in response.data['results']}
+        self.assertEqual(stylists['Stylist 0']['salon']['name'], 'Sparse 0')
+        self.assertIsNone(stylists['Stylist 0']['workplace'])
+        self.assertEqual(stylists['Stylist 1']['workplace']['name'], 'Sparse 1')
+
+        response = self.assertWithinQueryBudget(self.client, reverse('review-list'), 3, expand='appointment')
+        services = [review['appointment']['services'] for review in response.data['results']]
+        self.assertIn([{'id': Service.objects.get(name='Cut 0').pk, 'name': 'Cut 0'}], services)
+
+    def test_expand_with_fields(self):
+        response = self.client.get(reverse('blog-list'), {'fields': 'title,author', 'expand': 'author'})
+        self.assertIn({'title': 'Post 0', 'author': {'id': self.admin.pk, 'username': 'sparse-admin'}},
+                      response.data['results'])
+        # An expansion left out of ``fields`` is not rendered.
+        response = self.client.get(reverse('blog-list'), {'fields': 'title', 'expand': 'author'})
+        self.assertIn({'title': 'Post 0'}, response.data['results'])
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(reverse('blog-list') + '?fields=id&expand=author',
+                                    {'title': 'New', 'content': 'Body', 'author': self.admin.pk})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['author'], self.admin.pk)
+        self.assertEqual(response.data['content'], 'Body')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.salon = make_salon('Etag Salon')
+
+    def test_unchanged_list_is_not_modified_without_queries(self):
+        url = reverse('salon-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Another page or filter is another representation.
+        self.assertNotEqual(self.client.get(url, {'page': 1})['ETag'], etag)
+
+    def test_changes_produce_a_new_etag(self):
+        url = reverse('salon-detail', args=[self.salon.pk])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salon.name = 'Renamed'
+            self.salon.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Renamed')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_expanded_services_follow_salon_changes(self):
+        self.client.force_authenticate(User.objects.create_user(username='etag-user', password='pass12345'))
+        Service.objects.create(name='Cut', description='', price=20, duration=30, salon=self.salon)
+        url = reverse('service-list')
+        etag = self.client.get(url, {'expand': 'salon'})['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_salon('Another', address='2 Test St')
+        self.assertEqual(self.client.get(url, {'expand': 'salon'}, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_200_OK)
+
+    def test_large_responses_are_gzipped(self):
+        Promotion.objects.bulk_create(Promotion(title=f'Promo {n}', description='Half price ' * 20,
+                                                discount_percentage=50, valid_until=timezone.now())
+                                      for n in range(10))
+        response = self.client.get(reverse('promotion-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        with override_settings(GZIP_MIN_LENGTH=10 ** 6):
+            response = self.client.get(reverse('promotion-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('global-search')
+        self.salon = make_salon('Crème Hair Studio', address='12 Orchard Road',
+                                description='Balayage and colour specialists')
+        make_salon('Orchard Barbers', address='3 High St', description='Hot towel shaves')
+        self.stylist = make_stylist(self.salon, 'Orla Finch', specialties='Balayage, bridal', years_of_experience=4)
+        Service.objects.create(name='Balayage', description='Hand-painted colour', price=90, duration=120,
+                               salon=self.salon)
+
+    def names(self, response, kind):
+        return [row['name'] for row in response.data[kind]['results']]
+
+    def test_ranks_name_matches_first_and_ignores_accents(self):
+        response = self.client.get(self.url, {'q': 'orchard'})
+        self.assertEqual(self.names(response, 'salons'), ['Orchard Barbers', 'Crème Hair Studio'])
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'creme'}), 'salons'), ['Crème Hair Studio'])
+        # Every word must match, each as a prefix.
+        response = self.client.get(self.url, {'q': 'balay bridal'})
+        self.assertEqual(self.names(response, 'stylists'), ['Orla Finch'])
+        self.assertEqual(response.data['services']['count'], 0)
+
+    def test_types_filter_and_pagination(self):
+        for n in range(12):
+            Service.objects.create(name=f'Gloss {n}', description='', price=20, duration=30, salon=self.salon)
+        response = self.client.get(self.url, {'q': 'gloss', 'types': 'services', 'page': 2, 'page_size': 5})
+        self.assertEqual(set(response.data), {'page', 'page_size', 'services'})
+        self.assertEqual(response.data['services']['count'], 12)
+        self.assertEqual(self.names(response, 'services'), [f'Gloss {n}' for n in range(5, 10)])
+        response = self.client.get(self.url, {'q': 'gloss', 'types': 'services', 'page': 9})
+        self.assertEqual(response.data['services'], {'count': 12, 'results': []})
+
+        self.assertEqual(self.client.get(self.url, {'q': 'gloss', 'types': 'blogs'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'q': '"*( -'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'q': 'gloss', 'page': 0}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.stylist.specialties = 'Trichology'
+        self.stylist.save()
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'trichology'}), 'stylists'), ['Orla Finch'])
+        self.assertEqual(self.client.get(self.url, {'q': 'bridal'}).data['stylists']['count'], 0)
+        self.stylist.delete()
+        self.assertEqual(self.client.get(self.url, {'q': 'trichology'}).data['stylists']['count'], 0)
+        # Operators in user input are searched as words, not parsed.
+        self.assertEqual(self.client.get(self.url, {'q': 'hair AND NOT'}).status_code, status.HTTP_200_OK)
+
+
+class FuzzySearchTests(TestCase):
+    def setUp(self):
+        trigram_index.index.clear()
+        self.addCleanup(trigram_index.index.clear)
+        self.client = APIClient()
+        self.url = reverse('global-search')
+        self.salon = make_salon('Glamour Lounge')
+        make_stylist(self.salon, 'Siobhan Kowalczyk', years_of_experience=4)
+
+    def fuzzy(self, q, **params):
+        return self.client.get(self.url, {'q': q, 'fuzzy': 'true', **params}).data
+
+    def test_tolerates_misspellings(self):
+        self.assertEqual(self.fuzzy('glamor lunge')['salons']['results'][0]['name'], 'Glamour Lounge')
+        self.assertEqual(self.fuzzy('Shiobhan Kowalcyk')['stylists']['results'][0]['name'], 'Siobhan Kowalczyk')
+        # The exact index finds nothing for the same typo.
+        self.assertEqual(self.client.get(self.url, {'q': 'glamor lunge'}).data['salons']['count'], 0)
+        self.assertEqual(self.fuzzy('zzqx')['salons']['count'], 0)
+
+    def test_index_follows_committed_changes(self):
+        self.fuzzy('glamour')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salon.name = 'Velvet Rooms'
+            self.salon.save()
+        self.assertEqual(self.fuzzy('velvet roms')['salons']['results'][0]['id'], self.salon.pk)
+        self.assertNotIn(self.salon.pk, [row['id'] for row in self.fuzzy('glamour lounge')['salons']['results']])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salon.delete()
+        self.assertNotIn(self.salon.pk, [row['id'] for row in self.fuzzy('velvet rooms')['salons']['results']])
+
+    def test_pagination_and_query_count(self):
+        Salon.objects.bulk_create(build_salon(f'Quokka Parlour {n}') for n in range(8))
+        self.fuzzy('glamour')  # load the index
+        with self.assertNumQueries(1):
+            data = self.fuzzy('quoka parlor', types='salons', page=2, page_size=3)
+        self.assertEqual(data['salons']['count'], 8)
+        self.assertEqual(len(data['salons']['results']), 3)
+
+    def test_compaction_keeps_results(self):
+        index = TrigramIndex(['salons'])
+        index.load([('salons', n, f'Salon {n}') for n in range(100)])
+        for n in range(0, 100, 2):
+            index.update('salons', n, f'Parlour {n}')
+        for n in range(1, 40, 2):
+            index.remove('salons', n)
+        self.assertEqual(len(index), 80)
+        self.assertEqual(index.search('parlor 42', ['salons'], 0.4)['salons'][0][0], 42)
+        self.assertEqual({pk for pk, score in index.search('salon', ['salons'], 0.4)['salons']},
+                         set(range(41, 100, 2)))
@@ -0,0 +1,211 @@
+"""
+In-memory trigram index over salon, stylist and service names for
+typo-tolerant (``?fuzzy=true``) global search.
+
+Names are lower-cased, stripped of accents and split into words; each word
+is padded as ``"  word "`` and cut into trigrams, as PostgreSQL's pg_trgm
+does. The index maps every trigram to the entities containing it:
+
+* entities live in slots, three compact arrays of kind, primary key and
+  trigram count; a changed entity gets a new slot and its old one is
+  marked dead;
+* postings built at load or compaction time are sorted int32 NumPy
+  arrays; postings added since are plain lists, folded in once they grow
+  past a tenth of the index or a quarter of the slots are dead.
+
+A lookup concatenates the postings of the query's trigrams and counts
+shared trigrams per slot with ``bincount``, so its cost follows the size
+of those postings lists, not the number of Python objects. Memory is a
+few bytes per trigram occurrence, with names capped at
+``MAX_NAME_LENGTH`` characters.
+
+Each process loads its index from the database on the first fuzzy
+search. ``api.signals`` applies changes once they commit. Bulk writes skip
+signals; stale entries are harmless because results are re-read from the
+database, and a restart picks up missing ones.
+"""
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from .search_index import SEARCH_TYPES
+
+MAX_NAME_LENGTH = 100
+# Delta postings are folded into the arrays past this size (or a tenth of the index).
+MIN_COMPACT_POSTINGS = 10000
+
+WORD = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    text = unicodedata.normalize('NFKD', text[:MAX_NAME_LENGTH].lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    grams = set()
+    for word in WORD.findall(text):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    def __init__(self, kinds):
+        self.kinds = list(kinds)
+        self._codes = {kind: code for code, kind in enumerate(self.kinds)}
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._kinds = array('b')
+        self._pks = array('q')
+        self._sizes = array('H')  # trigram count per slot; 0 marks a dead slot
+        self._slots = {}  # (kind code, pk) -> slot
+        self._postings = {}  # trigram -> int32 array of slots
+        self._delta = defaultdict(list)  # trigram -> slots added since the last compaction
+        self._postings_size = 0
+        self._delta_size = 0
+        self._dead = 0
+
+    def load(self, entries):
+        """Replace the contents with ``entries``, an iterable of ``(kind, pk, name)``."""
+        with self._lock:
+            self._reset()
+            for kind, pk, name in entries:
+                self._insert(self._codes[kind], pk, name)
+            self._compact()
+            self.loaded = True
+
+    def ensure_loaded(self, entries):
+        """Load from ``entries()`` unless already loaded."""
+        with self._lock:
+            if not self.loaded:
+                self.load(entries())
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.loaded = False
+
+    def update(self, kind, pk, name):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._discard(self._codes[kind], pk)
+            self._insert(self._codes[kind], pk, name)
+            self._maybe_compact()
+
+    def remove(self, kind, pk):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._discard(self._codes[kind], pk)
+            self._maybe_compact()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _insert(self, code, pk, name):
+        grams = trigrams(name)
+        if not grams:
+            return
+        slot = len(self._pks)
+        self._kinds.append(code)
+        self._pks.append(pk)
+        self._sizes.append(len(grams))
+        self._slots[(code, pk)] = slot
+        for gram in grams:
+            self._delta[gram].append(slot)
+        self._delta_size += len(grams)
+
+    def _discard(self, code, pk):
+        slot = self._slots.pop((code, pk), None)
+        if slot is not None:
+            self._sizes[slot] = 0
+            self._dead += 1
+
+    def _maybe_compact(self):
+        if self._delta_size > max(MIN_COMPACT_POSTINGS, self._postings_size // 10) \
+                or self._dead > len(self._pks) // 4:
+            self._compact()
+
+    def _compact(self):
+        """Drop dead slots, renumber the live ones and merge delta postings into arrays."""
+        live = np.array(sorted(self._slots.values()), dtype=np.int64)
+        renumber = np.full(len(self._pks), -1, dtype=np.int32)
+        renumber[live] = np.arange(len(live), dtype=np.int32)
+
+        postings = {}
+        for gram in self._postings.keys() | self._delta.keys():
+            slots = self._postings.get(gram)
+            if gram in self._delta:
+                delta = np.array(self._delta[gram], dtype=np.int32)
+                slots = delta if slots is None else np.concatenate([slots, delta])
+            slots = renumber[slots]
+            slots = slots[slots >= 0]
+            if slots.size:
+                slots.sort()
+                postings[gram] = slots
+
+        self._kinds = array('b', np.asarray(self._kinds, dtype=np.int8)[live].tobytes())
+        self._pks = array('q', np.asarray(self._pks, dtype=np.int64)[live].tobytes())
+        self._sizes = array('H', np.asarray(self._sizes, dtype=np.uint16)[live].tobytes())
+        self._slots = {key: int(renumber[slot]) for key, slot in self._slots.items()}
+        self._postings = postings
+        self._delta = defaultdict(list)
+        self._postings_size = sum(slots.size for slots in postings.values())
+        self._delta_size = 0
+        self._dead = 0
+
+    def search(self, query, kinds, threshold):
+        """
+        Return ``{kind: [(pk, score), ...]}`` for ``kinds``, best first, keeping
+        matches scoring at least ``threshold``. The score averages the share
+        of the query's trigrams an entity has (a correct word inside a longer
+        name still scores) with their Dice coefficient (closer names rank
+        first).
+        """
+        grams = trigrams(query)
+        results = {kind: [] for kind in kinds}
+        if not grams:
+            return results
+        with self._lock:
+            parts = [self._postings[gram] for gram in grams if gram in self._postings]
+            parts += [np.array(self._delta[gram], dtype=np.int32) for gram in grams if gram in self._delta]
+            if not parts:
+                return results
+            hits = np.bincount(np.concatenate(parts), minlength=len(self._pks))
+            # Both halves of the score are at most 2 * shared / len(grams), so
+            # anything sharing fewer trigrams than this cannot reach threshold.
+            candidates = np.flatnonzero(hits >= max(1, math.ceil(threshold * len(grams) / 2)))
+            sizes = np.asarray(self._sizes, dtype=np.uint16)[candidates].astype(np.float64)
+            codes = np.asarray(self._kinds, dtype=np.int8)[candidates]
+            pks = np.asarray(self._pks, dtype=np.int64)[candidates]
+
+        shared = hits[candidates]
+        scores = (shared / len(grams) + 2 * shared / (len(grams) + sizes)) / 2
+        keep = (sizes > 0) & (scores >= threshold)
+        for kind in kinds:
+            mask = keep & (codes == self._codes[kind])
+            order = np.lexsort((pks[mask], -scores[mask]))
+            results[kind] = list(zip(pks[mask][order].tolist(), scores[mask][order].round(3).tolist()))
+        return results
+
+
+index = TrigramIndex(SEARCH_TYPES)
+
+
+def _entries():
+    for kind, search_type in SEARCH_TYPES.items():
+        for pk, name in search_type.model.objects.values_list('pk', 'name').iterator(chunk_size=5000):
+            yield kind, pk, name
+
+
+def fuzzy_search(query, kinds):
+    index.ensure_loaded(_entries)
+    return index.search(query, kinds, getattr(settings, 'FUZZY_SEARCH_THRESHOLD', 0.4))
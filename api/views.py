@@ -1,23 +1,5 @@
-from math import radians, sin, cos, sqrt, atan2
-
-def haversine_distance(lat1, lon1, lat2, lon2):
-    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
-        return None
-    
-    R = 6371  # Earth radius in kilometers
-
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    distance = R * c
-
-    return distance
-
-    return distance
-from django.db.models import Count, Sum
+from django.db.models import Count, Sum, Avg, Min, Max, F, Q
+from django.db.models.functions import Floor
 from rest_framework import viewsets, serializers, status, permissions
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
@@ -26,14 +8,22 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.decorators import action, api_view, permission_classes
 from datetime import datetime, timedelta
-from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.contrib.gis.db.models.functions import Distance
 from .models import Salon, Stylist, Service, Promotion
-from booking.models import Appointment
+from .nearby import nearest_salons, rank_candidates, salons_within, tile_candidates, encode_cursor, decode_cursor
+from . import nearby_cache
+from booking.models import Appointment, SlotHold, INACTIVE_STATUSES
+from notifications.broadcast import start_broadcast
+from notifications.models import Broadcast, Notification
+from notifications.outbox import enqueue_email
+from booking.reservations import (SlotUnavailable, book_occurrences, claim_hold, ensure_slot_free, lock_stylist,
+                                  place_hold, save_in_free_slot)
+from booking.availability import DEFAULT_DURATION, availability_grid, format_minutes, live_day_schedule, next_available
 from content.models import Review, Blog
-from .serializers import (SalonSerializer, StylistSerializer, ServiceSerializer, AppointmentSerializer, ReviewSerializer, BlogSerializer, PromotionSerializer)
+from .serializers import (SalonSerializer, StylistSerializer, ServiceSerializer, AppointmentSerializer, ReviewSerializer, BlogSerializer, PromotionSerializer, SlotHoldSerializer,
+                          RecurringAppointmentSerializer)
 from authentication.models import User
 from .permissions import IsSalonOwnerOrReadOnly, IsAdminUserOrReadOnly, IsStylist, IsSalonOwner
 from .reports import get_salon_report, get_stylist_report, get_appointment_report
@@ -42,7 +32,8 @@ from .serializers import (
     SalonSerializer, StylistSerializer, ServiceSerializer, 
     AppointmentSerializer, ReviewSerializer, BlogSerializer, 
     PromotionSerializer)
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from rest_framework import mixins
 from rest_framework import status
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -52,6 +43,53 @@ from booking.models import Appointment
 from .models import Salon, Service
 from .serializers import AppointmentSerializer, SalonSerializer
 from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.reverse import reverse
+from utils.pagination import CreatedAtCursorPagination
+from utils.conditional import ConditionalGetMixin
+from utils.serialization import FastListMixin, SparseFieldsetMixin
+from django.shortcuts import get_object_or_404
+
+NEARBY_DEFAULT_LIMIT = 6
+NEARBY_MAX_LIMIT = 100
+NEARBY_MAX_RADIUS_KM = 20000
+
+# Map clustering: grid cells per 256px map tile, the zoom level from which
+# individual salons are returned instead of clusters, the most salons listed
+# individually (busier viewports are clustered at any zoom), and the most
+# grid cells across the viewport (a coarser grid is used past that).
+CLUSTER_CELLS_PER_TILE = 4
+CLUSTER_MAX_ZOOM = 15
+CLUSTER_MAX_SALONS = 500
+CLUSTER_MAX_GRID = 16
+
+# Longest date range served by SalonViewSet.availability.
+AVAILABILITY_MAX_DAYS = 31
+
+
+def service_duration(params):
+    """
+    Minutes to reserve for a booking query: the summed ``Service.duration``
+    of ``?services=1,2``, else ``?duration=``, else the default slot length.
+    """
+    service_ids = params.get('services')
+    if service_ids:
+        try:
+            ids = [int(service_id) for service_id in service_ids.split(',')]
+        except ValueError:
+            raise ValueError("services must be a comma-separated list of ids.")
+        durations = dict(Service.objects.filter(pk__in=ids).values_list('pk', 'duration'))
+        if len(durations) != len(set(ids)):
+            raise ValueError("Unknown service id.")
+        return sum(durations[service_id] for service_id in ids)
+    try:
+        duration = int(params.get('duration', DEFAULT_DURATION))
+    except ValueError:
+        raise ValueError("duration must be a number of minutes.")
+    if duration <= 0:
+        raise ValueError("duration must be a number of minutes.")
+    return duration
 
 
 class CanClaimSalon(BasePermission):
@@ -64,8 +102,9 @@ class TestAuthView(APIView):
     def get(self, request):
         return Response({"message": "Authentication successful!"})
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all().order_by('id')
+    conditional_models = (Service, Salon)  # Salon for ?expand=salon
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUserOrReadOnly]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
@@ -87,9 +126,11 @@ class ServiceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
-class SalonViewSet(viewsets.ModelViewSet):
+class SalonViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Salon.objects.all()
+    conditional_models = (Salon,)
     serializer_class = SalonSerializer
+    fast_list_constants = {'distance': None}  # only nearby results carry a distance
 
     @action(detail=False, methods=['get'])
     def nearby(self, request):
@@ -105,21 +146,120 @@ class SalonViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({"error": "Invalid latitude or longitude."}, status=status.HTTP_400_BAD_REQUEST)
         
-        salons = Salon.objects.all()
-        
-        salons_with_distance = []
-        for salon in salons:
-            if salon.latitude is not None and salon.longitude is not None:
-                distance = haversine_distance(lat, lon, salon.latitude, salon.longitude)
-                if distance is not None:
-                    salon.distance = distance
-                    salons_with_distance.append((salon, distance))
-        
-        salons_with_distance.sort(key=lambda x: x[1])
-        nearby_salons = [salon for salon, _ in salons_with_distance[:6]]  # Get top 6 nearest salons
-        
+        paginated = any(param in request.query_params for param in ('radius_km', 'limit', 'cursor'))
+        try:
+            limit = int(request.query_params.get('limit', NEARBY_DEFAULT_LIMIT))
+            radius_km = request.query_params.get('radius_km')
+            radius_km = float(radius_km) if radius_km is not None else None
+            cursor = request.query_params.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return Response({"error": "Invalid limit, radius_km or cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= NEARBY_MAX_LIMIT:
+            return Response({"error": f"limit must be between 1 and {NEARBY_MAX_LIMIT}."}, status=status.HTTP_400_BAD_REQUEST)
+        if radius_km is not None and not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+            return Response({"error": f"radius_km must be between 0 and {NEARBY_MAX_RADIUS_KM}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Callers in the same small tile share one cached candidate set, which
+        # is re-ranked from the exact coordinates. Cursor pages are rare and
+        # reach past the first page's candidates, so they are not cached.
+        tile = nearby_cache.tile_for(lat, lon) if after is None else None
+        cache_header = {}
+        if tile is not None:
+            tile, centre_lat, centre_lon, slack_km = tile
+            cache_key = nearby_cache.candidates_key(tile, limit=limit, radius_km=radius_km)
+            candidates = nearby_cache.lookup(cache_key)
+            cache_header = {'X-Cache': 'MISS' if candidates is None else 'HIT'}
+            if candidates is None:
+                seen_sequence = nearby_cache.sequence()
+                candidates, reach_km = tile_candidates(centre_lat, centre_lon, limit + 1, radius_km, slack_km)
+                nearby_cache.store(cache_key, candidates, centre_lat, centre_lon, reach_km, seen_sequence)
+            # Fetch one extra salon to learn whether another page exists.
+            nearby_salons = rank_candidates(candidates, lat, lon, limit + 1, radius_km=radius_km)
+        elif radius_km is None:
+            nearby_salons = nearest_salons(lat, lon, limit + 1, after=after)
+        else:
+            nearby_salons = salons_within(lat, lon, radius_km, limit + 1, after=after)
+        has_next = len(nearby_salons) > limit
+        nearby_salons = nearby_salons[:limit]
+
         serializer = self.get_serializer(nearby_salons, many=True)
-        return Response(serializer.data)
+        if not paginated:
+            return Response(serializer.data, headers=cache_header)
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(nearby_salons[-1]))
+        return Response({'next': next_url, 'results': serializer.data}, headers=cache_header)
+
+    @action(detail=False, methods=['get'], url_path='nearby/cache-stats', permission_classes=[IsAdminUser])
+    def nearby_cache_stats(self, request):
+        return Response(nearby_cache.stats())
+
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        try:
+            min_lat, min_lon, max_lat, max_lon = (
+                float(request.query_params[param]) for param in ('min_lat', 'min_lon', 'max_lat', 'max_lon')
+            )
+            zoom = int(request.query_params['zoom'])
+        except (KeyError, ValueError):
+            return Response({"error": "min_lat, min_lon, max_lat, max_lon and zoom are required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180 and 0 <= zoom <= 22):
+            return Response({"error": "Invalid viewport or zoom."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # A viewport crossing the antimeridian arrives with min_lon > max_lon.
+        if min_lon <= max_lon:
+            lon_filter = Q(longitude__gte=min_lon, longitude__lte=max_lon)
+            lon_extent = max_lon - min_lon
+        else:
+            lon_filter = Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon)
+            lon_extent = max_lon - min_lon + 360
+        salons = Salon.objects.filter(lon_filter, latitude__gte=min_lat, latitude__lte=max_lat)
+
+        if zoom >= CLUSTER_MAX_ZOOM:
+            # The viewport is client-supplied, so list at most the cap.
+            listed = list(salons.order_by('id')[:CLUSTER_MAX_SALONS + 1])
+            if len(listed) <= CLUSTER_MAX_SALONS:
+                serializer = self.get_serializer(listed, many=True)
+                return Response({'zoom': zoom, 'salons': serializer.data})
+
+        # Group salons on a grid anchored at (-90, -180) so clusters stay put
+        # while the map pans; the database does the aggregation. The grid is
+        # that of a lower zoom when the viewport is wider than the zoom
+        # implies, so at most CLUSTER_MAX_GRID + 1 cells fit across it.
+        extent = max(max_lat - min_lat, lon_extent)
+        grid_zoom = zoom
+        while grid_zoom > 0 and extent * 2 ** grid_zoom * CLUSTER_CELLS_PER_TILE / 360 > CLUSTER_MAX_GRID:
+            grid_zoom -= 1
+        cell = 360 / (2 ** grid_zoom * CLUSTER_CELLS_PER_TILE)
+        cells = salons.annotate(
+            cell_x=Floor((F('longitude') + 180) / cell),
+            cell_y=Floor((F('latitude') + 90) / cell),
+        ).values('cell_x', 'cell_y').annotate(
+            count=Count('id'),
+            centroid_lat=Avg('latitude'),
+            centroid_lon=Avg('longitude'),
+            min_lat=Min('latitude'),
+            max_lat=Max('latitude'),
+            min_lon=Min('longitude'),
+            max_lon=Max('longitude'),
+            salon_id=Min('id'),
+        ).order_by('cell_y', 'cell_x')
+
+        clusters = []
+        for row in cells:
+            cluster = {
+                'count': row['count'],
+                'centroid': {'latitude': row['centroid_lat'], 'longitude': row['centroid_lon']},
+                'bounds': {
+                    'min_lat': row['min_lat'], 'min_lon': row['min_lon'],
+                    'max_lat': row['max_lat'], 'max_lon': row['max_lon'],
+                },
+            }
+            if row['count'] == 1:
+                cluster['salon_id'] = row['salon_id']
+            clusters.append(cluster)
+        return Response({'zoom': zoom, 'clusters': clusters})
 
     @action(detail=True, methods=['get'])
     def stylists(self, request, pk=None):
@@ -128,6 +268,64 @@ class SalonViewSet(viewsets.ModelViewSet):
         serializer = StylistSerializer(stylists, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        salon = self.get_object()
+        try:
+            start = request.query_params.get('start')
+            start = datetime.strptime(start, '%Y-%m-%d').date() if start else datetime.now().date()
+            days = int(request.query_params.get('days', 7))
+            duration = service_duration(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= AVAILABILITY_MAX_DAYS:
+            return Response({"error": f"days must be between 1 and {AVAILABILITY_MAX_DAYS}."}, status=status.HTTP_400_BAD_REQUEST)
+        end = start + timedelta(days=days - 1)
+
+        stylists = list(salon.stylists.order_by('id').values_list('id', 'name'))
+        grid = availability_grid([stylist_id for stylist_id, _ in stylists], start, end, duration)
+        return Response({
+            'start': start,
+            'end': end,
+            'duration': duration,
+            'stylists': [
+                {
+                    'id': stylist_id,
+                    'name': name,
+                    'availability': {
+                        day.isoformat(): [format_minutes(slot) for slot in slots]
+                        for day, slots in grid[stylist_id].items()
+                    },
+                }
+                for stylist_id, name in stylists
+            ],
+        })
+
+    @action(detail=True, methods=['get'], url_path='next-available', url_name='next_available')
+    def next_available(self, request, pk=None):
+        salon = self.get_object()
+        default_horizon = getattr(settings, 'NEXT_AVAILABLE_HORIZON_DAYS', 14)
+        try:
+            duration = service_duration(request.query_params)
+            horizon = int(request.query_params.get('horizon', default_horizon))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= horizon <= AVAILABILITY_MAX_DAYS * 3:
+            return Response({"error": f"horizon must be between 1 and {AVAILABILITY_MAX_DAYS * 3} days."}, status=status.HTTP_400_BAD_REQUEST)
+
+        stylists = dict(salon.stylists.values_list('id', 'name'))
+        found = next_available(sorted(stylists), duration, timezone.localtime(), horizon)
+        if found is None:
+            return Response({"detail": f"No availability in the next {horizon} days."}, status=status.HTTP_404_NOT_FOUND)
+        day, start, stylist_id = found
+        return Response({
+            'date': day,
+            'start_time': format_minutes(start),
+            'end_time': format_minutes(start + duration),
+            'duration': duration,
+            'stylist': {'id': stylist_id, 'name': stylists[stylist_id]},
+        })
+
     @action(detail=True, methods=['get'])
     def analytics(self, request, pk=None):
         salon = self.get_object()
@@ -179,7 +377,7 @@ class SalonViewSet(viewsets.ModelViewSet):
     def recommended(self, request):
         return self.top_rated(request)
 
-class StylistViewSet(viewsets.ModelViewSet):
+class StylistViewSet(FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Stylist.objects.all()
     serializer_class = StylistSerializer
     permission_classes = [IsAuthenticated]
@@ -191,8 +389,7 @@ class StylistViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def appointments(self, request, pk=None):
         stylist = self.get_object()
-        appointments = Appointment.objects.filter(stylist=stylist)
-        print(f"Stylist: {stylist.name}, Appointments count: {appointments.count()}")
+        appointments = Appointment.objects.filter(stylist=stylist).with_services()
         serializer = AppointmentSerializer(appointments, many=True)
         return Response(serializer.data)
     
@@ -200,23 +397,15 @@ class StylistViewSet(viewsets.ModelViewSet):
     def available_slots(self, request, pk=None):
         stylist = self.get_object()
         date = request.query_params.get('date', datetime.now().date())
-        if isinstance(date, str):
-            date = datetime.strptime(date, '%Y-%m-%d').date()
-        
-        start_time = datetime.combine(date, datetime.min.time()) + timedelta(hours=9)
-        end_time = datetime.combine(date, datetime.min.time()) + timedelta(hours=17)
-        
-        # Change this line to use 'start_time' instead of 'time'
-        booked_slots = Appointment.objects.filter(stylist=stylist, date=date).values_list('start_time', flat=True)
-        
-        available_slots = []
-        current_slot = start_time
-        while current_slot < end_time:
-            if current_slot.time() not in booked_slots:
-                available_slots.append(current_slot.strftime('%H:%M'))
-            current_slot += timedelta(minutes=30)
-        
-        return Response(available_slots)
+        try:
+            if isinstance(date, str):
+                date = datetime.strptime(date, '%Y-%m-%d').date()
+            duration = service_duration(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        schedule = live_day_schedule(stylist.pk, date)
+        return Response([format_minutes(slot) for slot in schedule.free_slots(duration)])
 
     @action(detail=True, methods=['post'])
     def claim(self, request, pk=None):
@@ -231,8 +420,9 @@ class StylistViewSet(viewsets.ModelViewSet):
         except IntegrityError:
             return Response({"detail": "You have already claimed a stylist profile."}, status=status.HTTP_400_BAD_REQUEST)
 class AppointmentViewSet(viewsets.ModelViewSet):
-    queryset = Appointment.objects.all()
+    queryset = Appointment.objects.with_services()
     serializer_class = AppointmentSerializer
+    pagination_class = CreatedAtCursorPagination
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -253,33 +443,108 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     def confirm(self, request, pk=None):
         try:
             appointment = self.get_object()
-            appointment.status = 'CONFIRMED'
-            appointment.save()
+            with transaction.atomic():
+                if appointment.status in INACTIVE_STATUSES:
+                    # Reactivating: the slot may have been booked since.
+                    lock_stylist(appointment.stylist_id)
+                    ensure_slot_free(appointment.stylist, appointment.date, appointment.start_time,
+                                     appointment.end_time, exclude_appointment=appointment)
+                appointment.status = 'CONFIRMED'
+                appointment.save()
             return Response({'status': 'appointment confirmed'}, status=status.HTTP_200_OK)
+        except SlotUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Appointment.DoesNotExist:
             return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['post'])
+    def recurring(self, request):
+        """
+        Book a series of appointments at once. Free occurrences are created
+        together; the rest are returned in ``conflicts`` with the reason.
+        """
+        serializer = RecurringAppointmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        stylist = data['stylist']
+        occurrences = [(day, data['start_time'], data['end_time']) for day in data['dates']]
+
+        with transaction.atomic():
+            created, conflicts = book_occurrences(
+                stylist, occurrences, services=data.get('services', []),
+                customer=data['customer'], salon=data['salon'],
+                total_price=data['total_price'], notes=data['notes'],
+            )
+            if created:
+                message = 'You have new appointments on ' + ', '.join(
+                    f'{appointment.date} at {appointment.start_time}' for appointment in created)
+                enqueue_email('New Appointments Booked', message, [stylist.email, data['customer'].email])
+        conflicts = [{'date': occurrences[index][0], 'error': reason} for index, reason in sorted(conflicts.items())]
+        if not created:
+            return Response({'created': [], 'conflicts': conflicts}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointments = (Appointment.objects.filter(pk__in=[appointment.pk for appointment in created])
+                        .with_services().order_by('date'))
+        return Response({
+            'created': AppointmentSerializer(appointments, many=True).data,
+            'conflicts': conflicts,
+        }, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer):
         stylist = serializer.validated_data['stylist']
         date = serializer.validated_data['date']
         start_time = serializer.validated_data['start_time']
-        
-        if Appointment.objects.filter(stylist=stylist, date=date, start_time=start_time).exists():
-            raise serializers.ValidationError("This time slot is already booked.")
-        
-        appointment = serializer.save()
-        
-        # Add services to the appointment
-        services = serializer.validated_data.get('services', [])
-        appointment.services.set(services)
-        
-        subject = 'New Appointment Booked'
-        message = f'You have a new appointment on {appointment.date} at {appointment.start_time}'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [appointment.stylist.email, appointment.customer.email]
-        send_mail(subject, message, from_email, recipient_list)
+        end_time = serializer.validated_data['end_time']
+        hold_token = self.request.data.get('hold')
+
+        # Check and insert under a per-stylist lock so concurrent bookings
+        # of overlapping times cannot both succeed.
+        try:
+            with transaction.atomic():
+                lock_stylist(stylist.pk)
+                hold = None
+                if hold_token:
+                    hold = claim_hold(hold_token, serializer.validated_data['customer'], stylist,
+                                      date, start_time, end_time)
+                ensure_slot_free(stylist, date, start_time, end_time, hold=hold)
+                appointment = serializer.save()
+                if hold is not None:
+                    hold.delete()
+
+                # Add services to the appointment
+                services = serializer.validated_data.get('services', [])
+                appointment.services.set(services)
+
+                # Queued in this transaction; the send_outbox worker delivers it.
+                subject = 'New Appointment Booked'
+                message = f'You have a new appointment on {appointment.date} at {appointment.start_time}'
+                recipient_list = [appointment.stylist.email, appointment.customer.email]
+                enqueue_email(subject, message, recipient_list)
+        except SlotUnavailable as e:
+            raise serializers.ValidationError(str(e))
+
+    def perform_update(self, serializer):
+        save_in_free_slot(serializer)
+
+class SlotHoldViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Short-lived holds that reserve a slot while a customer completes checkout."""
+    serializer_class = SlotHoldSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'token'
+
+    def get_queryset(self):
+        return SlotHold.objects.active().filter(customer=self.request.user)
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        try:
+            with transaction.atomic():
+                serializer.instance = place_hold(data['stylist'], self.request.user, data['date'],
+                                                 data['start_time'], data['end_time'])
+        except SlotUnavailable as e:
+            raise serializers.ValidationError(str(e))
 
 class AppointmentFilter(filters.FilterSet):
     service = filters.ModelMultipleChoiceFilter(
@@ -307,7 +572,7 @@ class ReportViewSet(viewsets.ViewSet):
     def appointment_report(self, request):
         return Response(get_appointment_report())
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
@@ -320,27 +585,58 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Review deleted successfully."})
         return Response({"detail": "You don't have permission to delete this review."}, status=status.HTTP_403_FORBIDDEN)
 
-class BlogViewSet(viewsets.ModelViewSet):
+class BlogViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Blog.objects.all()
     serializer_class = BlogSerializer
     permission_classes = [IsAuthenticated, IsAdminUserOrReadOnly]
 
 
 class NotificationView(APIView):
+    """
+    Broadcast a notification to every active user. The fan-out runs off the
+    request thread; poll the returned ``progress`` URL for its status.
+    """
     permission_classes = [IsAdminUser]
 
     def post(self, request):
         message = request.data.get('message')
-        users = User.objects.all()
-        
-        for user in users:
-            # Implement your preferred method to send notifications here
-            pass
-        
-        return Response({"detail": "Notifications sent successfully."})
+        if not message:
+            return Response({'error': 'message is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        notification_type = request.data.get('notification_type', 'INFO')
+        if notification_type not in dict(Notification.NOTIFICATION_TYPES):
+            return Response({'error': 'Invalid notification_type.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            broadcast = Broadcast.objects.create(message=message, notification_type=notification_type,
+                                                 created_by=request.user)
+            start_broadcast(broadcast)
+        return Response({
+            'id': broadcast.pk,
+            'progress': reverse('notification-broadcast-detail', args=[broadcast.pk], request=request),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def get(self, request, pk=None):
+        if pk is None:
+            broadcasts = Broadcast.objects.order_by('-created_at')[:20]
+            return Response([self._progress(broadcast) for broadcast in broadcasts])
+        broadcast = get_object_or_404(Broadcast, pk=pk)
+        return Response(self._progress(broadcast))
+
+    @staticmethod
+    def _progress(broadcast):
+        return {
+            'id': broadcast.pk,
+            'status': broadcast.status,
+            'total': broadcast.total,
+            'delivered': broadcast.delivered,
+            'error': broadcast.error,
+            'created_at': broadcast.created_at,
+            'finished_at': broadcast.finished_at,
+        }
 
-class PromotionViewSet(viewsets.ModelViewSet):
+class PromotionViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Promotion.objects.all()
+    conditional_models = (Promotion,)
     serializer_class = PromotionSerializer
     
     def get_permissions(self):
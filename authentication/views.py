@@ -1,7 +1,7 @@
 import logging
 from django.contrib.auth import get_user_model
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail
+from notifications.mail import send_now
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
@@ -73,7 +73,7 @@ class UserRegistrationView(APIView):
                 })
                 to_email = serializer.validated_data.get('email')
                 try:
-                    send_mail(mail_subject, message, settings.EMAIL_HOST_USER, [to_email])
+                    send_now(mail_subject, message, [to_email], from_email=settings.EMAIL_HOST_USER)
                     logger.info(f"Activation email sent to {to_email}")
                 except Exception as e:
                     logger.error(f"Failed to send activation email: {str(e)}")
@@ -117,7 +117,7 @@ class PasswordResetView(APIView):
                 }
                 email = render_to_string(email_template_name, c)
                 try:
-                    send_mail(subject, email, settings.EMAIL_HOST_USER, [associated_user.email], fail_silently=False)
+                    send_now(subject, email, [associated_user.email], from_email=settings.EMAIL_HOST_USER)
                     logger.info(f"Password reset email sent to {associated_user.email} for user {associated_user.username} (ID: {associated_user.id})")
                 except Exception as e:
                     logger.error(f"Failed to send password reset email: {str(e)}")
@@ -0,0 +1,235 @@
+"""
+Stylist availability computed from appointment intervals.
+
+A stylist's day is held as a sorted list of merged, half-open
+``[start, end)`` busy intervals in minutes since midnight, built from
+``Appointment.start_time``/``end_time``. Checking which slot starts can fit
+a service of a given length is then a single pass over the slot grid and
+the intervals together.
+
+Schedules are also materialised per stylist and day in Django's cache and
+refreshed by ``booking.signals`` whenever an appointment is saved or
+deleted, so availability reads normally skip the database entirely. Only
+those refreshes overwrite an entry: reads fill misses with ``cache.add``,
+so a read that loaded the day before a booking committed cannot replace
+the refreshed schedule with its stale copy.
+
+Checkout holds (``SlotHold``) last minutes, so they are not cached: the
+read paths overlay the live holds for their range with one extra query.
+"""
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Appointment, SlotHold, INACTIVE_STATUSES
+
+OPENING_TIME = time(9, 0)
+CLOSING_TIME = time(17, 0)
+SLOT_INTERVAL = 30  # minutes between offered start times
+DEFAULT_DURATION = 30  # minutes
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching ``(start, end)`` minute pairs."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class DaySchedule:
+    """One stylist's busy time on one day."""
+
+    def __init__(self, intervals=(), merged=False):
+        self.busy = list(intervals) if merged else merge_intervals(intervals)
+
+    @classmethod
+    def from_times(cls, rows):
+        """Build from ``(start_time, end_time)`` pairs as stored on Appointment."""
+        intervals = []
+        for start_time, end_time in rows:
+            start = to_minutes(start_time)
+            end = to_minutes(end_time)
+            # Malformed rows still block at least one slot from their start.
+            intervals.append((start, end if end > start else start + SLOT_INTERVAL))
+        return cls(intervals)
+
+    def iter_free_slots(self, duration=DEFAULT_DURATION, opening=OPENING_TIME, closing=CLOSING_TIME,
+                        step=SLOT_INTERVAL, not_before=0):
+        """
+        Yield the start minutes, on a ``step``-minute grid from ``opening``,
+        at which ``duration`` free minutes fit before ``closing``.
+        """
+        busy = self.busy
+        index = 0
+        start = to_minutes(opening)
+        last_start = to_minutes(closing) - duration
+        while start <= last_start:
+            # Skip intervals that end before this slot begins.
+            while index < len(busy) and busy[index][1] <= start:
+                index += 1
+            if index < len(busy) and busy[index][0] < start + duration:
+                # Jump to the first grid slot at or after the blocking interval's end.
+                blocked_until = busy[index][1]
+                start += -(-(blocked_until - start) // step) * step
+                continue
+            if start >= not_before:
+                yield start
+            start += step
+
+    def free_slots(self, duration=DEFAULT_DURATION, **kwargs):
+        return list(self.iter_free_slots(duration, **kwargs))
+
+    def first_free_slot(self, duration=DEFAULT_DURATION, **kwargs):
+        """The earliest slot start that fits ``duration``, or ``None``."""
+        return next(self.iter_free_slots(duration, **kwargs), None)
+
+    def fits(self, start, duration):
+        """Whether ``[start, start + duration)`` is free."""
+        end = start + duration
+        return all(busy_end <= start or busy_start >= end for busy_start, busy_end in self.busy)
+
+
+def day_schedule(stylist, date):
+    """Load ``stylist``'s schedule for ``date`` with one query."""
+    rows = (Appointment.objects
+            .filter(stylist=stylist, date=date)
+            .exclude(status__in=INACTIVE_STATUSES)
+            .values_list('start_time', 'end_time'))
+    return DaySchedule.from_times(rows)
+
+
+def date_range(start, end):
+    """Dates from ``start`` to ``end`` inclusive."""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def _cache_key(stylist_id, day):
+    return f'availability:{stylist_id}:{day.isoformat()}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def cached_day_schedule(stylist_id, day):
+    """``day_schedule`` served from the materialised cache when present."""
+    key = _cache_key(stylist_id, day)
+    busy = cache.get(key)
+    if busy is not None:
+        return DaySchedule(busy, merged=True)
+    schedule = day_schedule(stylist_id, day)
+    cache.add(key, schedule.busy, _cache_timeout())
+    return schedule
+
+
+def refresh_day_schedule(stylist_id, day):
+    """Rebuild one stylist's day from the database and store it in the cache."""
+    schedule = day_schedule(stylist_id, day)
+    cache.set(_cache_key(stylist_id, day), schedule.busy, _cache_timeout())
+    return schedule
+
+
+def schedules_between(stylist_ids, start, end):
+    """
+    Return the schedule of every stylist in ``stylist_ids`` for each day
+    from ``start`` to ``end`` (inclusive), keyed by ``(stylist_id, date)``.
+    Cached days are reused; if any are missing, the range is reloaded with
+    one query and the missing days are added to the cache.
+    """
+    keys = {(stylist_id, day): _cache_key(stylist_id, day)
+            for stylist_id in stylist_ids for day in date_range(start, end)}
+    cached = cache.get_many(list(keys.values()))
+    if len(cached) == len(keys):
+        return {key: DaySchedule(cached[cache_key], merged=True) for key, cache_key in keys.items()}
+
+    rows = (Appointment.objects
+            .filter(stylist_id__in=stylist_ids, date__gte=start, date__lte=end)
+            .exclude(status__in=INACTIVE_STATUSES)
+            .values_list('stylist_id', 'date', 'start_time', 'end_time'))
+    grouped = defaultdict(list)
+    for stylist_id, day, start_time, end_time in rows:
+        grouped[stylist_id, day].append((start_time, end_time))
+    schedules = {key: DaySchedule.from_times(grouped.get(key, ())) for key in keys}
+    for key, schedule in schedules.items():
+        if keys[key] not in cached:
+            cache.add(keys[key], schedule.busy, _cache_timeout())
+    return schedules
+
+
+def held_times(stylist_ids, start, end):
+    """Unexpired holds from ``start`` to ``end`` as ``{(stylist_id, date): [(start_time, end_time), ...]}``."""
+    held = defaultdict(list)
+    for stylist_id, day, start_time, end_time in (SlotHold.objects.active()
+                                                  .filter(stylist_id__in=stylist_ids, date__gte=start, date__lte=end)
+                                                  .values_list('stylist_id', 'date', 'start_time', 'end_time')):
+        held[stylist_id, day].append((start_time, end_time))
+    return held
+
+
+def with_holds(schedule, held):
+    """``schedule`` with the held ``(start_time, end_time)`` pairs marked busy."""
+    if not held:
+        return schedule
+    return DaySchedule(schedule.busy + DaySchedule.from_times(held).busy)
+
+
+def live_day_schedule(stylist_id, day):
+    """:func:`cached_day_schedule` plus the stylist's live holds that day."""
+    return with_holds(cached_day_schedule(stylist_id, day), held_times([stylist_id], day, day)[stylist_id, day])
+
+
+def availability_grid(stylist_ids, start, end, duration=DEFAULT_DURATION):
+    """Free slot starts for each stylist and day: ``{stylist_id: {date: [minutes]}}``."""
+    schedules = schedules_between(stylist_ids, start, end)
+    held = held_times(stylist_ids, start, end)
+    days = date_range(start, end)
+    return {
+        stylist_id: {day: with_holds(schedules[stylist_id, day], held[stylist_id, day]).free_slots(duration)
+                     for day in days}
+        for stylist_id in stylist_ids
+    }
+
+
+def next_available(stylist_ids, duration, now, horizon_days, window_days=7):
+    """
+    Find the earliest ``(date, start_minutes, stylist_id)`` from ``now`` on
+    at which any stylist in ``stylist_ids`` has ``duration`` free minutes,
+    looking at most ``horizon_days`` ahead. Days are loaded a window at a
+    time and the search stops at the first day with a fit, so the answer
+    costs a handful of range queries (plus one for the holds). Returns
+    ``None`` when nothing fits.
+    """
+    today = now.date()
+    not_before = now.hour * 60 + now.minute
+    last_day = today + timedelta(days=horizon_days - 1)
+    held = held_times(stylist_ids, today, last_day)
+    window_start = today
+    while window_start <= last_day:
+        window_end = min(window_start + timedelta(days=window_days - 1), last_day)
+        schedules = schedules_between(stylist_ids, window_start, window_end)
+        for day in date_range(window_start, window_end):
+            best = None
+            for stylist_id in stylist_ids:
+                slot = with_holds(schedules[stylist_id, day], held[stylist_id, day]).first_free_slot(
+                    duration, not_before=not_before if day == today else 0)
+                if slot is not None and (best is None or slot < best[0]):
+                    best = (slot, stylist_id)
+            if best is not None:
+                return day, best[0], best[1]
+        window_start = window_end + timedelta(days=1)
+    return None
@@ -0,0 +1,58 @@
+import random
+import time
+from datetime import time as dtime
+
+from django.core.management.base import BaseCommand
+
+from booking.availability import DaySchedule, format_minutes
+
+
+class Command(BaseCommand):
+    help = 'Times the availability engine against the old slot-by-slot scan on dense calendars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2000)
+        parser.add_argument('--appointments', type=int, nargs='+', default=[8, 32, 96])
+        parser.add_argument('--duration', type=int, default=45)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        duration = options['duration']
+        for per_day in options['appointments']:
+            # A 24-hour day on a 5-minute grid packed with short appointments.
+            calendars = []
+            for _ in range(options['days']):
+                rows = []
+                for _ in range(per_day):
+                    start = rng.randrange(0, 24 * 60 - 15, 5)
+                    end = min(start + rng.choice([10, 15, 30, 60]), 24 * 60 - 1)
+                    rows.append((dtime(start // 60, start % 60), dtime(end // 60, end % 60)))
+                calendars.append(rows)
+
+            started = time.perf_counter()
+            for rows in calendars:
+                self._legacy(rows)
+            legacy = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for rows in calendars:
+                schedule = DaySchedule.from_times(rows)
+                [format_minutes(slot) for slot in schedule.free_slots(duration, dtime(0, 0), dtime(23, 59), step=5)]
+            engine = time.perf_counter() - started
+
+            self.stdout.write(
+                f'{per_day:>4} appointments/day: legacy {legacy / options["days"] * 1e6:.1f}us/day, '
+                f'engine {engine / options["days"] * 1e6:.1f}us/day '
+                f'({duration}-minute service, overlap-aware)'
+            )
+
+    def _legacy(self, rows):
+        # The previous available_slots loop: exact start-time matches only.
+        booked = [start for start, _ in rows]
+        slots = []
+        for minutes in range(0, 24 * 60 - 1, 5):
+            slot = dtime(minutes // 60, minutes % 60)
+            if slot not in booked:
+                slots.append(slot.strftime('%H:%M'))
+        return slots
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:41
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_salon_latitude_longitude_index'),
+        ('booking', '0006_alter_appointment_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['stylist', 'date'], name='booking_app_stylist_d53865_idx'),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='stylist',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='api.stylist'),
+        ),
+        migrations.AddIndex(
+            model_name='slothold',
+            index=models.Index(fields=['stylist', 'date'], name='booking_slo_stylist_dd2ab4_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_salon_latitude_longitude_index'),
+        ('booking', '0007_slothold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['created_at', 'id'], name='booking_app_created_789ac3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['customer', 'created_at', 'id'], name='booking_app_custome_2f6dd3_idx'),
+        ),
+    ]
@@ -1,9 +1,28 @@
 # booking/models.py
 
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from authentication.models import User
 from api.models import Salon, Stylist, Service
 
+# Appointments in these states no longer hold the stylist's time.
+INACTIVE_STATUSES = ['CANCELLED']
+
+
+class AppointmentQuerySet(models.QuerySet):
+    def overlapping(self, stylist, date, start_time, end_time):
+        """Active appointments of ``stylist`` intersecting ``[start_time, end_time)`` on ``date``."""
+        return self.filter(
+            stylist=stylist, date=date, start_time__lt=end_time, end_time__gt=start_time,
+        ).exclude(status__in=INACTIVE_STATUSES)
+
+    def with_services(self):
+        """Prefetch the services ``AppointmentSerializer`` renders, in one query for the whole page."""
+        return self.prefetch_related(models.Prefetch('services', queryset=Service.objects.only('id', 'name')))
+
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('BOOKED', 'Booked'),
@@ -24,5 +43,46 @@ class Appointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AppointmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stylist', 'date']),
+            # Keyset pagination: newest-first listings, overall and per customer.
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['customer', 'created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Appointment for {self.customer} with {self.stylist} on {self.date}"
+
+
+class SlotHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def overlapping(self, stylist, date, start_time, end_time):
+        """Unexpired holds on ``stylist`` intersecting ``[start_time, end_time)`` on ``date``."""
+        return self.active().filter(stylist=stylist, date=date, start_time__lt=end_time, end_time__gt=start_time)
+
+
+class SlotHold(models.Model):
+    """A short-lived reservation of a stylist's time while a customer checks out."""
+    stylist = models.ForeignKey(Stylist, on_delete=models.CASCADE, related_name='slot_holds')
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='slot_holds')
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SlotHoldQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stylist', 'date']),
+        ]
+
     def __str__(self):
-        return f"Appointment for {self.customer} with {self.stylist} on {self.date}"
\ No newline at end of file
+        return f"Hold on {self.stylist} on {self.date} at {self.start_time} until {self.expires_at}"
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Race-free reservation of a stylist's time.
+
+Booking and holding both run inside a transaction that first locks the
+stylist's row, so concurrent requests for the same stylist are checked
+and written one at a time. A slot is free when no active appointment and
+no unexpired hold (other than the one the caller is booking through)
+overlaps ``[start, end)``.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from api.models import Stylist
+from .availability import refresh_day_schedule
+from .models import Appointment, SlotHold, INACTIVE_STATUSES
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def lock_stylist(stylist_id):
+    """
+    Lock the stylist's row until the surrounding transaction ends. SQLite has
+    no row locks, so there a no-op UPDATE takes the database write lock up
+    front instead of letting two transactions race from read to write.
+    """
+    if connection.features.has_select_for_update:
+        list(Stylist.objects.select_for_update().filter(pk=stylist_id).values_list('pk'))
+    else:
+        Stylist.objects.filter(pk=stylist_id).update(id=F('id'))
+
+
+def claim_hold(token, customer, stylist, date, start_time, end_time):
+    """
+    Return the caller's unexpired hold ``token`` if it covers the booking of
+    ``stylist`` on ``date`` from ``start_time`` to ``end_time``; raise
+    ``SlotUnavailable`` otherwise, including for another customer's token.
+    """
+    try:
+        hold = SlotHold.objects.active().filter(token=token, customer=customer).first()
+    except ValidationError:
+        hold = None  # not a UUID
+    if hold is None or hold.stylist_id != stylist.pk or hold.date != date \
+            or hold.start_time > start_time or hold.end_time < end_time:
+        raise SlotUnavailable("Invalid hold token.")
+    return hold
+
+
+def ensure_slot_free(stylist, date, start_time, end_time, hold=None, exclude_appointment=None):
+    if end_time <= start_time:
+        raise SlotUnavailable("End time must be after start time.")
+    appointments = Appointment.objects.overlapping(stylist, date, start_time, end_time)
+    if exclude_appointment is not None:
+        appointments = appointments.exclude(pk=exclude_appointment.pk)
+    if appointments.exists():
+        raise SlotUnavailable("This time slot is already booked.")
+    holds = SlotHold.objects.overlapping(stylist, date, start_time, end_time)
+    if hold is not None:
+        holds = holds.exclude(pk=hold.pk)
+    if holds.exists():
+        raise SlotUnavailable("This time slot is being held by another customer.")
+
+
+def save_in_free_slot(serializer, **save_kwargs):
+    """
+    Save an appointment serializer under the stylist lock once its slot is
+    known to be free, excluding the appointment itself on update. A taken
+    slot is reported as a ``ValidationError``.
+    """
+    instance = serializer.instance
+    data = serializer.validated_data
+    stylist = data.get('stylist', getattr(instance, 'stylist', None))
+    try:
+        with transaction.atomic():
+            lock_stylist(stylist.pk)
+            ensure_slot_free(stylist, data.get('date', getattr(instance, 'date', None)),
+                             data.get('start_time', getattr(instance, 'start_time', None)),
+                             data.get('end_time', getattr(instance, 'end_time', None)),
+                             exclude_appointment=instance)
+            return serializer.save(**save_kwargs)
+    except SlotUnavailable as e:
+        raise serializers.ValidationError(str(e))
+
+
+def place_hold(stylist, customer, date, start_time, end_time):
+    """
+    Hold the slot for ``SLOT_HOLD_MINUTES``, up to ``SLOT_HOLD_MAX_PER_CUSTOMER``
+    live holds per customer; call inside ``transaction.atomic``.
+    """
+    lock_stylist(stylist.pk)
+    SlotHold.objects.filter(stylist=stylist, date=date, expires_at__lte=timezone.now()).delete()
+    limit = getattr(settings, 'SLOT_HOLD_MAX_PER_CUSTOMER', 3)
+    if SlotHold.objects.active().filter(customer=customer).count() >= limit:
+        raise SlotUnavailable(f"You can hold at most {limit} slots at a time.")
+    ensure_slot_free(stylist, date, start_time, end_time)
+    minutes = getattr(settings, 'SLOT_HOLD_MINUTES', 10)
+    return SlotHold.objects.create(
+        stylist=stylist, customer=customer, date=date, start_time=start_time, end_time=end_time,
+        expires_at=timezone.now() + timedelta(minutes=minutes),
+    )
+
+
+def find_conflicts(stylist, occurrences):
+    """
+    Check ``(date, start_time, end_time)`` occurrences against the stylist's
+    calendar with one range query for appointments and one for holds.
+    Returns ``{index: reason}`` for each occurrence that cannot be booked,
+    including ones overlapping an earlier occurrence in the same batch.
+    """
+    if not occurrences:
+        return {}
+    dates = [date for date, _, _ in occurrences]
+    window = {'stylist': stylist, 'date__gte': min(dates), 'date__lte': max(dates)}
+    taken = defaultdict(list)
+    for date, start_time, end_time in (Appointment.objects.filter(**window)
+                                       .exclude(status__in=INACTIVE_STATUSES)
+                                       .values_list('date', 'start_time', 'end_time')):
+        taken[date].append((start_time, end_time, "This time slot is already booked."))
+    for date, start_time, end_time in SlotHold.objects.active().filter(**window).values_list('date', 'start_time', 'end_time'):
+        taken[date].append((start_time, end_time, "This time slot is being held by another customer."))
+
+    conflicts = {}
+    for index, (date, start_time, end_time) in enumerate(occurrences):
+        if end_time <= start_time:
+            conflicts[index] = "End time must be after start time."
+            continue
+        for busy_start, busy_end, reason in taken[date]:
+            if busy_start < end_time and busy_end > start_time:
+                conflicts[index] = reason
+                break
+        else:
+            taken[date].append((start_time, end_time, "Overlaps another occurrence in this request."))
+    return conflicts
+
+
+def book_occurrences(stylist, occurrences, services=(), **fields):
+    """
+    Create an appointment for every occurrence that is free, in one
+    ``bulk_create`` plus one insert of the ``services`` through rows.
+    ``fields`` are the remaining Appointment fields shared by all of them.
+    Returns ``(appointments, conflicts)``; call inside ``transaction.atomic``.
+    """
+    lock_stylist(stylist.pk)
+    conflicts = find_conflicts(stylist, occurrences)
+    appointments = Appointment.objects.bulk_create([
+        Appointment(stylist=stylist, date=date, start_time=start_time, end_time=end_time, **fields)
+        for index, (date, start_time, end_time) in enumerate(occurrences) if index not in conflicts
+    ])
+    Through = Appointment.services.through
+    Through.objects.bulk_create([
+        Through(appointment_id=appointment.pk, service_id=service.pk)
+        for appointment in appointments for service in services
+    ])
+
+    # bulk_create sends no post_save, so refresh the cached schedules here.
+    days = {appointment.date for appointment in appointments}
+
+    def refresh():
+        for day in days:
+            refresh_day_schedule(stylist.pk, day)
+
+    transaction.on_commit(refresh)
+    return appointments, conflicts
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Appointment, Review
+from api.serializers import AppointmentSerializer  # noqa: F401 (shared with the API)
+from content.models import Review
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .availability import refresh_day_schedule
+from .models import Appointment
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_appointment_slot(sender, instance, **kwargs):
+    previous = Appointment.objects.filter(pk=instance.pk).values_list('stylist_id', 'date').first() if instance.pk else None
+    instance._previous_slot = previous
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    days = {(instance.stylist_id, instance.date)}
+    previous = getattr(instance, '_previous_slot', None)
+    if previous is not None:
+        days.add(previous)
+
+    def refresh():
+        for stylist_id, day in days:
+            refresh_day_schedule(stylist_id, day)
+
+    transaction.on_commit(refresh)
@@ -1,3 +1,135 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from api.tests import make_salon, make_stylist
+from authentication.models import User
+from .availability import (DaySchedule, _cache_key, cached_day_schedule, format_minutes, merge_intervals,
+                           next_available, schedules_between)
+from .models import Appointment, SlotHold
+
+
+class DayScheduleTests(SimpleTestCase):
+    def test_merge_intervals(self):
+        self.assertEqual(merge_intervals([(60, 90), (0, 30), (30, 45), (80, 120)]), [(0, 45), (60, 120)])
+
+    def test_free_slots_respect_end_time_and_duration(self):
+        schedule = DaySchedule.from_times([(time(10, 0), time(11, 15)), (time(13, 0), time(13, 30))])
+        slots = [format_minutes(slot) for slot in schedule.free_slots(60)]
+        self.assertEqual(slots, ['09:00', '11:30', '12:00', '13:30', '14:00', '14:30', '15:00', '15:30', '16:00'])
+
+    def test_empty_day(self):
+        self.assertEqual(len(DaySchedule().free_slots(30)), 16)
+        self.assertEqual(DaySchedule().free_slots(9 * 60), [])
+
+    def test_matches_brute_force(self):
+        import random
+        rng = random.Random(5)
+        for _ in range(200):
+            intervals = []
+            for _ in range(rng.randint(0, 12)):
+                start = rng.randrange(8 * 60, 18 * 60, 5)
+                intervals.append((start, start + rng.choice([5, 15, 30, 45, 90])))
+            schedule = DaySchedule(intervals)
+            duration = rng.choice([15, 30, 45, 60, 120])
+            expected = [
+                start for start in range(9 * 60, 17 * 60 - duration + 1, 30)
+                if all(end <= start or begin >= start + duration for begin, end in intervals)
+            ]
+            self.assertEqual(schedule.free_slots(duration), expected)
+            self.assertEqual([schedule.fits(start, duration) for start in expected], [True] * len(expected))
+
+    def test_not_before(self):
+        self.assertEqual(DaySchedule().free_slots(60, not_before=15 * 60 + 1), [15 * 60 + 30, 16 * 60])
+
+
+class AvailabilityCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cache', password='pass12345')
+        self.salon = make_salon('Cache')
+        self.stylist = make_stylist(self.salon)
+        self.day = date(2030, 1, 7)
+
+    def book(self, start, end, day=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Appointment.objects.create(customer=self.user, stylist=self.stylist, salon=self.salon,
+                                              date=day or self.day, start_time=start, end_time=end,
+                                              total_price=20)
+
+    def test_reads_are_served_from_cache(self):
+        self.book(time(9, 0), time(10, 0))
+        with self.assertNumQueries(0):
+            schedule = cached_day_schedule(self.stylist.pk, self.day)
+        self.assertEqual(schedule.busy, [(540, 600)])
+
+    def test_cancel_and_reschedule_update_cache(self):
+        appointment = self.book(time(9, 0), time(10, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'CANCELLED'
+            appointment.save()
+        self.assertEqual(cached_day_schedule(self.stylist.pk, self.day).busy, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'BOOKED'
+            appointment.date = date(2030, 1, 8)
+            appointment.save()
+        self.assertEqual(cached_day_schedule(self.stylist.pk, self.day).busy, [])
+        self.assertEqual(cached_day_schedule(self.stylist.pk, date(2030, 1, 8)).busy, [(540, 600)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_day_schedule(self.stylist.pk, date(2030, 1, 8)).busy, [])
+
+    def test_reads_do_not_overwrite_refreshed_days(self):
+        # Stands in for a signal refresh that landed while the read was querying.
+        refreshed = [(600, 660)]
+        cache.set(_cache_key(self.stylist.pk, self.day), refreshed)
+        schedules_between([self.stylist.pk], self.day, date(2030, 1, 8))
+        self.assertEqual(cache.get(_cache_key(self.stylist.pk, self.day)), refreshed)
+        self.assertEqual(cache.get(_cache_key(self.stylist.pk, date(2030, 1, 8))), [])
+
+
+class NextAvailableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='next', password='pass12345')
+        self.salon = make_salon('Next')
+        self.stylists = [make_stylist(self.salon, f'Stylist {i}') for i in range(2)]
+        self.ids = [stylist.pk for stylist in self.stylists]
+
+    def book(self, stylist, day, start, end):
+        Appointment.objects.create(customer=self.user, stylist=stylist, salon=self.salon, date=day,
+                                   start_time=start, end_time=end, total_price=20)
+
+    def test_earliest_fit_across_stylists(self):
+        self.book(self.stylists[0], date(2030, 1, 7), time(9, 0), time(17, 0))
+        self.book(self.stylists[1], date(2030, 1, 7), time(9, 0), time(15, 0))
+        now = datetime(2030, 1, 7, 8, 0)
+        self.assertEqual(next_available(self.ids, 90, now, 14), (date(2030, 1, 7), 15 * 60, self.stylists[1].pk))
+        self.assertEqual(next_available(self.ids, 150, now, 14), (date(2030, 1, 8), 9 * 60, self.stylists[0].pk))
+
+    def test_held_slots_are_skipped(self):
+        self.book(self.stylists[1], date(2030, 1, 7), time(9, 0), time(17, 0))
+        SlotHold.objects.create(stylist=self.stylists[0], customer=self.user, date=date(2030, 1, 7),
+                                start_time=time(9, 0), end_time=time(10, 0),
+                                expires_at=timezone.now() + timedelta(minutes=10))
+        now = datetime(2030, 1, 7, 8, 0)
+        self.assertEqual(next_available(self.ids, 60, now, 14), (date(2030, 1, 7), 10 * 60, self.stylists[0].pk))
+
+    def test_skips_past_times_today(self):
+        now = datetime(2030, 1, 7, 16, 10)
+        self.assertEqual(next_available(self.ids, 30, now, 14), (date(2030, 1, 7), 16 * 60 + 30, self.ids[0]))
+        self.assertEqual(next_available(self.ids, 60, now, 14), (date(2030, 1, 8), 9 * 60, self.ids[0]))
+
+    def test_horizon_bounds_search_and_queries(self):
+        for day in range(7, 28):
+            for stylist in self.stylists:
+                self.book(stylist, date(2030, 1, day), time(9, 0), time(17, 0))
+        # Three week-long windows plus one query for the holds.
+        with self.assertNumQueries(4):
+            self.assertIsNone(next_available(self.ids, 30, datetime(2030, 1, 7, 8, 0), 21))
+        self.assertEqual(next_available(self.ids, 30, datetime(2030, 1, 7, 8, 0), 22)[0], date(2030, 1, 28))
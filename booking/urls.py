@@ -1,9 +1,14 @@
 from django.urls import path
 from .views import AppointmentListCreateView, AppointmentDetailView, ReviewListCreateView, ReviewDetailView
 
-urlpatterns = [
+# Only these are mounted under /booking/; the review views below have no
+# owner checks, so reviews stay on /api/reviews/.
+appointment_urlpatterns = [
     path('appointments/', AppointmentListCreateView.as_view(), name='appointment-list-create'),
     path('appointments/<int:pk>/', AppointmentDetailView.as_view(), name='appointment-detail'),
+]
+
+urlpatterns = appointment_urlpatterns + [
     path('reviews/', ReviewListCreateView.as_view(), name='review-list-create'),
     path('reviews/<int:pk>/', ReviewDetailView.as_view(), name='review-detail'),
 ]
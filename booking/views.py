@@ -1,31 +1,35 @@
 # views.py
 
 from rest_framework import generics, permissions
-from .models import Appointment, Review
+from content.models import Review
+from utils.pagination import CreatedAtCursorPagination
+from .models import Appointment
+from .reservations import save_in_free_slot
 from .serializers import AppointmentSerializer, ReviewSerializer
 
 class AppointmentListCreateView(generics.ListCreateAPIView):
-    queryset = Appointment.objects.all()
+    queryset = Appointment.objects.with_services()
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return self.queryset.filter(customer=self.request.user)
 
     def perform_create(self, serializer):
-        # Make sure all required fields are present
-        time = serializer.validated_data.get('start_time')  # Use appropriate field names
-        # You can do additional processing here if needed
-        serializer.save(customer=self.request.user)
+        save_in_free_slot(serializer, customer=self.request.user)
 
 class AppointmentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Appointment.objects.all()
+    queryset = Appointment.objects.with_services()
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return self.queryset.filter(customer=self.request.user)
 
+    def perform_update(self, serializer):
+        save_in_free_slot(serializer)
+
 class ReviewListCreateView(generics.ListCreateAPIView):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from utils.conditional import bump_table_versions
+from .models import FAQ, StaticPage
+
+
+@receiver([post_save, post_delete], sender=FAQ)
+@receiver([post_save, post_delete], sender=StaticPage)
+def content_changed(sender, **kwargs):
+    bump_table_versions([sender])
@@ -1,3 +1,53 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from authentication.models import User
+from notifications.models import OutboxEmail
+from .models import FAQ, StaticPage
+
+
+class ConditionalContentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.page = StaticPage.objects.create(title='About', slug='about', content='About us')
+        FAQ.objects.create(question='Open on Sundays?', answer='No')
+
+    def assertRevalidates(self, url, change):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_faq_list(self):
+        self.assertRevalidates(reverse('faq-list'), lambda: FAQ.objects.create(question='Parking?', answer='Yes'))
+
+    def test_static_page(self):
+        def edit():
+            self.page.content = 'About us, updated'
+            self.page.save()
+        self.assertRevalidates(reverse('static-page-detail', args=[self.page.pk]), edit)
+
+    def test_writes_are_unconditional(self):
+        self.client.force_authenticate(User.objects.create_user(username='content-admin', password='pass12345',
+                                                                is_staff=True))
+        url = reverse('static-page-detail', args=[self.page.pk])
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(url, {'content': 'Patched'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ContactFormTests(TestCase):
+    def test_message_is_stored_in_outbox(self):
+        response = APIClient().post(reverse('contact-form'), {
+            'name': 'Ana', 'email': 'ana@example.com', 'message': 'Do you do colour?'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        queued = OutboxEmail.objects.get()
+        self.assertEqual((queued.subject, queued.body, queued.from_email),
+                         ('Contact Form Submission from Ana', 'Do you do colour?', 'ana@example.com'))
+        self.assertEqual(queued.status, 'PENDING')
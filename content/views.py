@@ -3,7 +3,8 @@ from .models import Blog, StaticPage, FAQ
 from .serializers import BlogPostSerializer, StaticPageSerializer, FAQSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.core.mail import send_mail
+from notifications.outbox import enqueue_email
+from utils.conditional import ConditionalGetMixin
 from rest_framework import viewsets, permissions
 from .models import FAQ
 from .serializers import FAQSerializer
@@ -24,8 +25,9 @@ class StaticPageListCreateView(generics.ListCreateAPIView):
     serializer_class = StaticPageSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class StaticPageDetailView(generics.RetrieveUpdateDestroyAPIView):
+class StaticPageDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = StaticPage.objects.all()
+    conditional_models = (StaticPage,)
     serializer_class = StaticPageSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
@@ -37,13 +39,12 @@ class ContactFormView(APIView):
         email = request.data.get('email')
         message = request.data.get('message')
         
-        # Send email
-        send_mail(
+        # Stored in the outbox and sent (with retries) by the outbox worker
+        enqueue_email(
             f'Contact Form Submission from {name}',
             message,
-            email,
             ['your-email@example.com'],
-            fail_silently=False,
+            from_email=email,
         )
         
         return Response({"message": "Your message has been sent successfully."})
@@ -55,7 +56,8 @@ class IsAdminUserOrReadOnly(permissions.BasePermission):
             return True
         return request.user and request.user.is_staff
 
-class FAQViewSet(viewsets.ModelViewSet):
+class FAQViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = FAQ.objects.all()
+    conditional_models = (FAQ,)
     serializer_class = FAQSerializer
     permission_classes = [IsAdminUserOrReadOnly]
\ No newline at end of file
@@ -1,3 +1,45 @@
+from datetime import time
+
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Service
+from api.tests import make_salon, make_stylist
+from authentication.models import User
+from booking.models import Appointment
+from content.models import Review
+from utils.testing import QueryBudgetMixin
+
+
+class DashboardQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(username='dash-owner', password='pass12345', role='salon_owner')
+        self.stylist_user = User.objects.create_user(username='dash-stylist', password='pass12345', role='stylist')
+        customer = User.objects.create_user(username='dash-customer', password='pass12345')
+        salon = make_salon('Dash', owner=self.owner)
+        stylist = make_stylist(salon, user=self.stylist_user)
+        services = [Service.objects.create(name=f'Cut {n}', description='', price=20, duration=30, salon=salon)
+                    for n in range(3)]
+        for hour in range(9, 15):
+            appointment = Appointment.objects.create(customer=customer, stylist=stylist, salon=salon,
+                                                     date=timezone.now().date(), start_time=time(hour, 0),
+                                                     end_time=time(hour, 30), total_price=20)
+            appointment.services.set(services)
+            Review.objects.create(appointment=appointment, rating=4, comment='Nice')
+
+    def test_salon_owner_dashboard(self):
+        self.client.force_authenticate(self.owner)
+        response = self.assertWithinQueryBudget(self.client, reverse('dashboard'), 6)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['today_appointments'], 6)
+        self.assertEqual(len(response.data['recent_reviews']), 5)
 
-# Create your tests here.
+    def test_stylist_dashboard(self):
+        self.client.force_authenticate(self.stylist_user)
+        response = self.assertWithinQueryBudget(self.client, reverse('dashboard'), 4)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['popular_services'][0]['count'], 6)
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from api.models import Salon, Service
 from authentication.models import User
 from booking.models import Appointment as BookingAppointment
+from content.models import Review
 from django.db.models import Count, Sum
 from django.utils import timezone
 from django.shortcuts import render
@@ -58,7 +59,7 @@ class DashboardView(APIView):
             "total_appointments": BookingAppointment.objects.count(),
             "appointments_last_30_days": BookingAppointment.objects.filter(date__gte=last_30_days).count(),
             "appointments_by_status": BookingAppointment.objects.values('status').annotate(count=Count('id')),
-            "popular_services": Service.objects.annotate(appointment_count=Count('appointment')).order_by('-appointment_count')[:5].values('name', 'appointment_count'),
+            "popular_services": Service.objects.annotate(appointment_count=Count('appointments')).order_by('-appointment_count')[:5].values('name', 'appointment_count'),
         }
 
     def get_revenue_stats(self, last_30_days):
@@ -104,8 +105,8 @@ class DashboardView(APIView):
             "stylist_name": stylist.name,
             "today_appointments": appointments.count(),
             "upcoming_appointments": BookingAppointment.objects.filter(stylist=stylist, date__gt=today).count(),
-            "recent_reviews": stylist.reviews.order_by('-created_at')[:5].values('rating', 'comment'),
-            "popular_services": Service.objects.filter(appointment__stylist=stylist).annotate(count=Count('appointment')).order_by('-count')[:5].values('name', 'count'),
+            "recent_reviews": Review.objects.filter(appointment__stylist=stylist).order_by('-created_at')[:5].values('rating', 'comment'),
+            "popular_services": Service.objects.filter(appointments__stylist=stylist).annotate(count=Count('appointments')).order_by('-count')[:5].values('name', 'count'),
         }
         return Response(data)
     
@@ -121,8 +122,8 @@ class DashboardView(APIView):
             "salon_name": salon.name,
             "today_appointments": appointments.count(),
             "total_stylists": salon.stylists.count(),
-            "recent_reviews": salon.reviews.order_by('-created_at')[:5].values('rating', 'comment'),
-            "popular_services": Service.objects.filter(appointment__salon=salon).annotate(count=Count('appointment')).order_by('-count')[:5].values('name', 'count'),
+            "recent_reviews": Review.objects.filter(appointment__salon=salon).order_by('-created_at')[:5].values('rating', 'comment'),
+            "popular_services": Service.objects.filter(appointments__salon=salon).annotate(count=Count('appointments')).order_by('-count')[:5].values('name', 'count'),
             "total_revenue": BookingAppointment.objects.filter(salon=salon, status='completed').aggregate(Sum('total_price'))['total_price__sum'] or 0,
         }
         return Response(data)
@@ -2,6 +2,10 @@
 ASGI config for hairsalon_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with uvicorn, which the notification stream needs (``runserver`` is
+WSGI-only)::
+
+    uvicorn hairsalon_backend.asgi:application --host 0.0.0.0 --port 8000
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -69,6 +69,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -81,6 +82,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'hairsalon_backend.urls'
 
+# Requests per URL name kept by utils.metrics for /api/metrics/ percentiles.
+REQUEST_METRICS_WINDOW = 1000
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -110,6 +114,20 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/ref/settings/#caches
+#
+# Nearby results, catalogue ETags and availability schedules are invalidated
+# through version counters kept here, so every process must share this cache.
+# The local-memory backend is per process: with more than one worker, point
+# it at Redis or Memcached (`manage.py check --deploy` warns until you do).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -159,9 +177,29 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # orjson-backed JSON with the same output as DRF's JSONRenderer.
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     # ... other settings ...
 }
 
+# Catalogue list endpoints (salons, services, stylists, promotions) render
+# from .values() rows via utils.serialization; False uses the serializers.
+FAST_LIST_SERIALIZATION = True
+
+# Minimum trigram similarity (0-1) for /api/search/?fuzzy=true matches.
+FUZZY_SEARCH_THRESHOLD = 0.4
+
+# Catalogue views using utils.conditional gzip responses at least this large.
+GZIP_MIN_LENGTH = 1024
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -224,8 +262,53 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
+# All mail is sent through notifications.mail over one reused connection.
+# Booking emails go through notifications.OutboxEmail and are sent by
+# `manage.py send_outbox`, OUTBOX_BATCH_SIZE at a time, checking for new rows
+# every OUTBOX_POLL_INTERVAL seconds when idle. Failed sends are retried after
+# OUTBOX_RETRY_DELAY * 2**(attempt - 1) seconds, at most OUTBOX_MAX_RETRY_DELAY.
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_POLL_INTERVAL = 5.0
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_MAX_RETRY_DELAY = 60 * 60
+OUTBOX_LEASE_SECONDS = 300
+
+# Admin broadcasts insert one Notification per active user, BROADCAST_CHUNK_SIZE
+# rows per INSERT, on a background thread after the request commits. A
+# broadcast with no progress for BROADCAST_STALE_SECONDS (its process died) is
+# finished from where it stopped by `manage.py resume_broadcasts`.
+BROADCAST_CHUNK_SIZE = 5000
+BROADCAST_IN_BACKGROUND = True
+BROADCAST_STALE_SECONDS = 300
+
+# /notifications/stream/ (Server-Sent Events; needs an ASGI server, e.g.
+# `uvicorn hairsalon_backend.asgi:application`, and answers 501 under WSGI).
+# Idle streams get a comment line every NOTIFICATION_STREAM_HEARTBEAT
+# seconds. A client more than NOTIFICATION_STREAM_QUEUE_SIZE events behind is
+# disconnected and catches up from Last-Event-ID when it reconnects.
+NOTIFICATION_STREAM_HEARTBEAT = 25
+NOTIFICATION_STREAM_QUEUE_SIZE = 100
+
 SITE_URL = f'http://{MACHINE_IP}:8000'
 
+# /api/salons/nearby/ response cache: geohash length of the tile requests are
+# snapped to (7 is ~150m; None disables the cache) and entry lifetime in seconds.
+NEARBY_CACHE_PRECISION = 7
+NEARBY_CACHE_TIMEOUT = 300
+
+# Lifetime in seconds of the per-stylist, per-day schedules kept in the cache
+# by booking.signals; they are refreshed on every appointment change.
+AVAILABILITY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# How many days ahead /api/salons/{id}/next-available/ searches by default.
+NEXT_AVAILABLE_HORIZON_DAYS = 14
+
+# Minutes a checkout hold (/api/holds/) reserves a slot before it expires.
+SLOT_HOLD_MINUTES = 10
+# Live holds one customer may keep at once, so no account can block a calendar.
+SLOT_HOLD_MAX_PER_CUSTOMER = 3
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
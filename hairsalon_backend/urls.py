@@ -1,11 +1,14 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from booking.urls import appointment_urlpatterns
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('auth/', include('authentication.urls')),
     path('notifications/', include('notifications.urls')),
+    path('booking/', include((appointment_urlpatterns, 'booking'))),
     path('content/', include('content.urls')),
     path('dashboard/', include('dashboard.urls')),
 ]
\ No newline at end of file
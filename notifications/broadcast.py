@@ -0,0 +1,115 @@
+"""
+Fan-out of admin broadcasts into per-user notifications.
+
+User ids are read in keyset-ordered chunks of ``BROADCAST_CHUNK_SIZE`` with
+``values_list``, and each chunk becomes one multi-row INSERT via
+``bulk_create`` (plus one upsert and one UPDATE of the unread counters), so
+memory stays flat and the cost per chunk does not depend on how many users
+there are. ``Broadcast.delivered``, ``last_user_id`` and ``heartbeat_at``
+are advanced in the same transaction as each chunk, so progress can be
+polled while the fan-out runs and a fan-out that died with its process is
+picked up where it stopped by :func:`resume_stale` (``manage.py
+resume_broadcasts``) once it has been quiet for ``BROADCAST_STALE_SECONDS``.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from authentication.models import User
+from . import stream, unread
+from .models import Broadcast, Notification
+
+logger = logging.getLogger(__name__)
+
+
+def fan_out(broadcast_id, chunk_size=None):
+    """
+    Create the notifications for one broadcast, starting after the last
+    recipient already recorded on it; returns how many this call wrote.
+    """
+    chunk_size = chunk_size or getattr(settings, 'BROADCAST_CHUNK_SIZE', 5000)
+    progress = Broadcast.objects.filter(pk=broadcast_id)
+    delivered = 0
+    try:
+        broadcast = Broadcast.objects.get(pk=broadcast_id)
+        recipients = User.objects.filter(is_active=True)
+        last_id = broadcast.last_user_id
+        if last_id:
+            progress.update(status='RUNNING', heartbeat_at=timezone.now())
+        else:
+            progress.update(status='RUNNING', heartbeat_at=timezone.now(), total=recipients.count())
+
+        while True:
+            user_ids = list(recipients.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not user_ids:
+                break
+            with transaction.atomic():
+                created = Notification.objects.bulk_create([
+                    Notification(user_id=user_id, message=broadcast.message,
+                                 notification_type=broadcast.notification_type)
+                    for user_id in user_ids
+                ])
+                unread.increment(user_ids)
+                progress.update(delivered=F('delivered') + len(user_ids), last_user_id=user_ids[-1],
+                                heartbeat_at=timezone.now())
+            stream.publish(created)
+            delivered += len(user_ids)
+            last_id = user_ids[-1]
+    except Exception as exc:
+        logger.exception("Broadcast %s failed after %s notifications", broadcast_id, delivered)
+        progress.update(status='FAILED', error=str(exc), finished_at=timezone.now())
+        raise
+    progress.update(status='DONE', finished_at=timezone.now())
+    return delivered
+
+
+def resume_stale(stale_after=None):
+    """
+    Finish queued or running broadcasts that have made no progress for
+    ``stale_after`` seconds (default ``BROADCAST_STALE_SECONDS``), e.g.
+    because the process running them was restarted. Each one is claimed
+    with a conditional UPDATE first, so concurrent callers never resume the
+    same broadcast twice. Returns the ids that were resumed.
+    """
+    stale_after = stale_after or getattr(settings, 'BROADCAST_STALE_SECONDS', 300)
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Broadcast.objects.filter(status__in=['QUEUED', 'RUNNING'], heartbeat_at__lt=cutoff)
+    resumed = []
+    for broadcast_id in stale.order_by('pk').values_list('pk', flat=True):
+        if not stale.filter(pk=broadcast_id).update(heartbeat_at=timezone.now()):
+            continue  # claimed by someone else meanwhile
+        try:
+            fan_out(broadcast_id)
+        except Exception:
+            continue  # already logged and recorded on the broadcast
+        resumed.append(broadcast_id)
+    return resumed
+
+
+def _run_in_thread(broadcast_id):
+    try:
+        fan_out(broadcast_id)
+    except Exception:
+        pass  # already logged and recorded on the broadcast
+    finally:
+        connections.close_all()
+
+
+def start_broadcast(broadcast):
+    """
+    Fan ``broadcast`` out once the current transaction commits, on a
+    background thread unless ``BROADCAST_IN_BACKGROUND`` is off.
+    """
+    if getattr(settings, 'BROADCAST_IN_BACKGROUND', True):
+        def run():
+            threading.Thread(target=_run_in_thread, args=(broadcast.pk,), name=f'broadcast-{broadcast.pk}',
+                             daemon=True).start()
+    else:
+        def run():
+            fan_out(broadcast.pk)
+    transaction.on_commit(run)
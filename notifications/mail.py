@@ -0,0 +1,126 @@
+"""
+Shared mail delivery.
+
+Every outgoing email goes through one :class:`MailDispatcher` per process,
+which keeps a single backend connection (``get_connection()``) open between
+messages instead of doing a fresh SMTP/TLS handshake for each one.
+Request handlers that need to know whether delivery worked use
+:func:`send_now`; mail that can wait goes through the outbox
+(:mod:`notifications.outbox`), whose worker hands whole batches to
+:meth:`MailDispatcher.deliver`. The connection is locked per message, not
+per batch, so a ``send_now`` never queues behind a worker's batch.
+:func:`stats` reports throughput for this process.
+"""
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+class MailDispatcher:
+    def __init__(self):
+        self._lock = threading.Lock()  # stats
+        self._send_lock = threading.Lock()  # the connection
+        self._connection = None
+        self.reset_stats()
+
+    def deliver(self, messages):
+        """
+        Send ``messages`` over the shared connection, one at a time so a bad
+        recipient does not fail its neighbours. Returns a list holding, for
+        each message, ``None`` if it was sent or the exception that stopped it.
+        """
+        if not messages:
+            return []
+        results = []
+        busy = 0.0
+        for message in messages:
+            # Lock per message so other callers can interleave with a batch.
+            with self._send_lock:
+                started = time.perf_counter()
+                results.append(self._send_one(message))
+                busy += time.perf_counter() - started
+        sent = results.count(None)
+        with self._lock:
+            self._batches += 1
+            self._busy += busy
+            self._sent += sent
+            self._failed += len(results) - sent
+        return results
+
+    def send_now(self, message):
+        """Send one message immediately; raises if it could not be sent."""
+        error = self.deliver([message])[0]
+        if error is not None:
+            raise error
+
+    def close(self):
+        with self._send_lock:
+            self._close_connection()
+
+    def reset_stats(self):
+        with self._lock:
+            self._sent = self._failed = self._batches = 0
+            self._busy = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sent': self._sent,
+                'failed': self._failed,
+                'batches': self._batches,
+                'send_seconds': round(self._busy, 6),
+                'messages_per_second': round(self._sent / self._busy, 2) if self._busy else None,
+            }
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _get_connection(self):
+        if self._connection is None:
+            connection = get_connection()
+            connection.open()
+            self._connection = connection
+        return self._connection
+
+    def _send_one(self, message):
+        # A reused connection may have been dropped by the server while idle,
+        # so reconnect once before counting the message as failed.
+        for _ in range(2):
+            try:
+                message.connection = self._get_connection()
+                message.send()
+                return None
+            except smtplib.SMTPServerDisconnected as exc:
+                self._close_connection()
+                error = exc
+            except Exception as exc:
+                # After anything but a refused recipient the session state is
+                # unknown; start the next message on a fresh connection.
+                if not isinstance(exc, smtplib.SMTPRecipientsRefused):
+                    self._close_connection()
+                return exc
+        return error
+
+
+dispatcher = MailDispatcher()
+
+
+def _message(subject, body, recipients, from_email=None):
+    return EmailMessage(subject, body, from_email or settings.DEFAULT_FROM_EMAIL,
+                        [recipient for recipient in recipients if recipient])
+
+
+def send_now(subject, body, recipients, from_email=None):
+    """Drop-in for ``send_mail`` that reuses the shared connection."""
+    dispatcher.send_now(_message(subject, body, recipients, from_email))
+
+
+def stats():
+    return dispatcher.stats()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from notifications.broadcast import resume_stale
+
+
+class Command(BaseCommand):
+    help = 'Finishes admin broadcasts whose fan-out stopped part-way, e.g. after a restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=None,
+                            help='Seconds without progress before a broadcast counts as stalled')
+
+    def handle(self, *args, **options):
+        for broadcast_id in resume_stale(options['stale_after']):
+            self.stdout.write(f"resumed broadcast {broadcast_id}")
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications import mail
+from notifications.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Sends queued outbox emails, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds to sleep when there is nothing to send (default OUTBOX_POLL_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval is None:
+            interval = getattr(settings, 'OUTBOX_POLL_INTERVAL', 5.0)
+        try:
+            while True:
+                sent, failed = deliver_batch(options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(f"sent {sent}, failed {failed} ({mail.stats()['messages_per_second']} msg/s)")
+                    continue
+                if options['once']:
+                    return
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = (
@@ -18,10 +19,88 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at']),
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.get_notification_type_display()} for {self.user}: {self.message[:50]}..."
 
     def mark_as_read(self):
         self.is_read = True
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class UnreadCounter(models.Model):
+    """
+    Denormalised count of a user's unread notifications, so the unread
+    badge is a primary-key lookup. Kept in step by ``notifications.signals``
+    for single-row changes and by the bulk paths that bypass signals.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                related_name='unread_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user}: {self.unread} unread"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent by the ``send_outbox`` worker. Rows are
+    written in the same transaction as the change they announce, so a
+    rolled-back booking never sends mail and a committed one always will.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim = models.UUIDField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_status_display()} email to {', '.join(self.recipients)}: {self.subject[:50]}"
+
+
+class Broadcast(models.Model):
+    """An admin message fanned out as one Notification per active user."""
+    STATUS_CHOICES = (
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    message = models.TextField()
+    notification_type = models.CharField(max_length=10, choices=Notification.NOTIFICATION_TYPES, default='INFO')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='broadcasts')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    total = models.PositiveIntegerField(default=0)
+    delivered = models.PositiveIntegerField(default=0)
+    # Resume point: the fan-out has written notifications for every active
+    # user up to this id. heartbeat_at moves on with each chunk.
+    last_user_id = models.BigIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Broadcast {self.pk} ({self.get_status_display()}): {self.delivered}/{self.total}"
@@ -0,0 +1,113 @@
+"""
+Transactional outbox for outgoing email.
+
+Request handlers call :func:`enqueue_email` instead of ``send_mail``; that
+only inserts an :class:`OutboxEmail` row, so it commits or rolls back with
+the surrounding transaction and never waits on the mail server. The
+``send_outbox`` management command drains due rows in batches through the
+shared connection in :mod:`notifications.mail`, retrying failures with exponential backoff until
+``OUTBOX_MAX_ATTEMPTS`` is reached.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from . import mail
+from .models import OutboxEmail
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Queue an email for the worker; returns the row, or ``None`` if nobody would receive it."""
+    recipients = [recipient for recipient in recipients if recipient]
+    if not recipients:
+        return None
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, recipients=recipients,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying after ``attempts`` failures."""
+    base = _setting('OUTBOX_RETRY_DELAY', 30)
+    return min(base * 2 ** (attempts - 1), _setting('OUTBOX_MAX_RETRY_DELAY', 60 * 60))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to ``batch_size`` due emails to this worker and return them.
+    The lease is one conditional UPDATE, so concurrent workers never pick
+    the same row; a worker that dies mid-batch loses its lease after
+    ``OUTBOX_LEASE_SECONDS`` and the rows become due again.
+    """
+    now = timezone.now()
+    claim = uuid.uuid4()
+    due = OutboxEmail.objects.filter(status='PENDING', next_attempt_at__lte=now)
+    ids = due.order_by('next_attempt_at', 'pk').values('pk')[:batch_size]
+    due.filter(pk__in=ids).update(
+        claim=claim, next_attempt_at=now + timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300)),
+    )
+    return list(OutboxEmail.objects.filter(claim=claim).order_by('pk'))
+
+
+def deliver_batch(batch_size=None):
+    """
+    Send one batch of due emails through the shared mail connection.
+    Returns ``(sent, failed)`` counts; an empty batch returns ``(0, 0)``.
+    """
+    emails = claim_batch(batch_size or _setting('OUTBOX_BATCH_SIZE', 50))
+    if not emails:
+        return 0, 0
+
+    max_attempts = _setting('OUTBOX_MAX_ATTEMPTS', 8)
+    messages = [EmailMessage(email.subject, email.body, email.from_email, email.recipients) for email in emails]
+    sent = failed = 0
+    for email, error in zip(emails, mail.dispatcher.deliver(messages)):
+        if error is None:
+            email.status = 'SENT'
+            email.sent_at = timezone.now()
+            email.attempts += 1
+            email.claim = None
+            email.last_error = ''
+            sent += 1
+        else:
+            _record_failure(email, error, max_attempts)
+            failed += 1
+    OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'claim', 'last_error', 'sent_at'])
+    return sent, failed
+
+
+def stats(window=timedelta(minutes=15)):
+    """
+    Delivery counters read from the outbox table, so they cover every
+    ``send_outbox`` worker rather than one process. ``messages_per_second``
+    is the send rate over the last ``window``.
+    """
+    since = timezone.now() - window
+    counts = OutboxEmail.objects.aggregate(
+        pending=Count('pk', filter=Q(status='PENDING')),
+        sent=Count('pk', filter=Q(status='SENT')),
+        failed=Count('pk', filter=Q(status='FAILED')),
+        sent_recently=Count('pk', filter=Q(status='SENT', sent_at__gte=since)),
+    )
+    counts['window_seconds'] = int(window.total_seconds())
+    counts['messages_per_second'] = round(counts['sent_recently'] / window.total_seconds(), 2)
+    return counts
+
+
+def _record_failure(email, exc, max_attempts):
+    email.attempts += 1
+    email.claim = None
+    email.last_error = f'{type(exc).__name__}: {exc}'
+    if email.attempts >= max_attempts:
+        email.status = 'FAILED'
+    else:
+        email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import stream, unread
+from .models import Notification
+
+
+@receiver(pre_save, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    instance._was_unread = (
+        Notification.objects.filter(pk=instance.pk, is_read=False).exists() if instance.pk else False
+    )
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    was_unread = getattr(instance, '_was_unread', False)
+    if not instance.is_read and not was_unread:
+        unread.increment([instance.user_id])
+    elif instance.is_read and was_unread:
+        unread.decrement(instance.user_id)
+    if created:
+        transaction.on_commit(lambda: stream.publish([instance]))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread.decrement(instance.user_id)
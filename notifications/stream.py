@@ -0,0 +1,96 @@
+"""
+In-process pub/sub that pushes new notifications to open event streams.
+
+Each connected client holds a :class:`Subscription`, an ``asyncio.Queue``
+on the event loop serving its request. ``publish`` may be called from any
+thread (signal handlers, the broadcast worker) and hands events to the
+subscriber's loop with ``call_soon_threadsafe``, so an idle client costs
+one open socket and one empty queue, not repeated queries.
+
+Only clients connected to the same process are reached; with several
+ASGI workers a client that misses events catches up through
+``Last-Event-ID`` when it reconnects.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+# Put on a subscriber's queue when it fell too far behind; the stream then
+# ends and the client reconnects, resuming from its Last-Event-ID.
+OVERFLOW = object()
+
+
+class Subscription:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=getattr(settings, 'NOTIFICATION_STREAM_QUEUE_SIZE', 100))
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Make room for the sentinel; the client will resync on reconnect.
+            self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+
+class NotificationBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def is_subscribed(self, user_id):
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is already gone.
+                self.unsubscribe(subscription)
+
+
+broker = NotificationBroker()
+
+
+def event_payload(notification):
+    return {
+        'id': notification.pk,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def format_event(payload):
+    """Encode one notification as a Server-Sent Events message."""
+    return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+
+def publish(notifications):
+    """Push ``notifications`` to any of their owners who are connected here."""
+    for notification in notifications:
+        if broker.is_subscribed(notification.user_id):
+            broker.publish(notification.user_id, event_payload(notification))
@@ -1,3 +1,363 @@
-from django.test import TestCase
+import asyncio
+import io
+import socketserver
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.tests import make_salon, make_stylist
+from authentication.models import User
+from . import mail as mail_delivery
+from .broadcast import fan_out
+from .stream import broker
+from .views import _events
+from .models import Broadcast, Notification, OutboxEmail, UnreadCounter
+from .outbox import deliver_batch, enqueue_email
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server to accept messages and remember them."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.sessions = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.sessions += 1
+        self.reply('220 stand-in ready')
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 stand-in')
+            elif command.startswith('RCPT'):
+                recipients.append(raw.decode().split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 end with .')
+                lines = []
+                for data in self.rfile:
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data)
+                self.server.messages.append((recipients, b''.join(lines)))
+                recipients = []
+                self.reply('250 queued')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class BrokenBackend(LocmemBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('mail server down')
+
+
+def smtp_settings(server):
+    return override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+        EMAIL_PORT=server.server_address[1], EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='')
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        # The shared connection outlives override_settings; start and end clean.
+        mail_delivery.dispatcher.close()
+        self.addCleanup(mail_delivery.dispatcher.close)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='outbox', password='pass12345', email='client@example.com')
+        self.client.force_authenticate(self.user)
+        self.salon = make_salon('Outbox')
+        self.stylist = make_stylist(self.salon, email='sam@example.com')
+
+    def book(self, start, end):
+        return self.client.post(reverse('appointment-list'), {
+            'customer': self.user.pk, 'stylist': self.stylist.pk, 'salon': self.salon.pk,
+            'date': '2030-01-07', 'start_time': start, 'end_time': end, 'total_price': 20,
+        })
+
+    def test_booking_queues_email_instead_of_sending(self):
+        self.assertEqual(self.book('10:00', '11:00').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.book('10:30', '11:30').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.recipients, ['sam@example.com', 'client@example.com'])
+
+        call_command('send_outbox', '--once', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboxEmail.objects.get().status, 'SENT')
+
+    def test_delivers_over_smtp(self):
+        for n in range(3):
+            enqueue_email(f'Reminder {n}', 'See you soon', [f'user{n}@example.com'])
+        with SMTPStandIn() as server, smtp_settings(server):
+            self.assertEqual(deliver_batch(), (3, 0))
+        self.assertEqual([recipients for recipients, _ in server.messages],
+                         [['<user0@example.com>'], ['<user1@example.com>'], ['<user2@example.com>']])
+        self.assertEqual(deliver_batch(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.BrokenBackend', OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+    def test_failures_back_off_then_give_up(self):
+        email = enqueue_email('Hello', 'Body', ['someone@example.com'])
+        self.assertEqual(deliver_batch(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('PENDING', 1))
+        self.assertIn('mail server down', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(deliver_batch(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_batch(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('FAILED', 2))
+
+    def test_rows_not_yet_due_are_skipped(self):
+        enqueue_email('Hello', 'Body', ['someone@example.com'])
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(deliver_batch(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class MailDispatcherTests(TestCase):
+    def setUp(self):
+        mail_delivery.dispatcher.close()
+        self.addCleanup(mail_delivery.dispatcher.close)
+        mail_delivery.dispatcher.reset_stats()
+
+    def test_one_connection_for_many_messages(self):
+        with SMTPStandIn() as server, smtp_settings(server):
+            for n in range(5):
+                mail_delivery.send_now('Hi', 'Body', [f'user{n}@example.com'])
+            mail_delivery.dispatcher.close()
+        self.assertEqual(len(server.messages), 5)
+        self.assertEqual(server.sessions, 1)
+        stats = mail_delivery.stats()
+        self.assertEqual((stats['sent'], stats['failed'], stats['batches']), (5, 0, 5))
+        self.assertIsNotNone(stats['messages_per_second'])
+
+    def test_send_now_does_not_wait_for_a_whole_batch(self):
+        def batch():
+            yield mail_delivery._message('First', 'Body', ['user1@example.com'])
+            # Mid-batch: a request-path send must get the connection now.
+            request = threading.Thread(target=mail_delivery.send_now, args=('Now', 'Body', ['now@example.com']))
+            request.start()
+            request.join(timeout=5)
+            self.assertFalse(request.is_alive())
+            yield mail_delivery._message('Second', 'Body', ['user2@example.com'])
+
+        self.assertEqual(mail_delivery.dispatcher.deliver(batch()), [None, None])
+        self.assertEqual([message.subject for message in mail.outbox], ['First', 'Now', 'Second'])
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.BrokenBackend')
+    def test_send_now_raises(self):
+        with self.assertRaises(ConnectionRefusedError):
+            mail_delivery.send_now('Hi', 'Body', ['user@example.com'])
+        self.assertEqual(mail_delivery.stats()['failed'], 1)
+
+    def test_stats_are_staff_only(self):
+        url = reverse('mail-stats')
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='mailer', password='pass12345'))
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        client.force_authenticate(User.objects.create_user(username='mail-admin', password='pass12345', is_staff=True))
+        self.assertEqual(client.get(url).data['sent'], 0)
+
+    def test_stats_come_from_the_outbox(self):
+        for n in range(3):
+            enqueue_email('Hello', 'Body', [f'user{n}@example.com'])
+        OutboxEmail.objects.filter(pk=OutboxEmail.objects.earliest('pk').pk).update(status='FAILED')
+        deliver_batch()
+        enqueue_email('Later', 'Body', ['later@example.com'])
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='mail-admin', password='pass12345', is_staff=True))
+        stats = client.get(reverse('mail-stats')).data
+        self.assertEqual((stats['pending'], stats['sent'], stats['failed'], stats['sent_recently']), (1, 2, 1, 2))
+        self.assertEqual(stats['messages_per_second'], round(2 / stats['window_seconds'], 2))
+
+
+@override_settings(BROADCAST_IN_BACKGROUND=False)
+class BroadcastTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='broadcaster', password='pass12345', is_staff=True)
+        User.objects.bulk_create([User(username=f'listener{n}') for n in range(25)])
+        User.objects.create_user(username='banned', password='pass12345', is_active=False)
+        self.active = User.objects.filter(is_active=True).count()
+
+    def test_fan_out_inserts_in_chunks(self):
+        broadcast = Broadcast.objects.create(message='Closed on Monday')
+        # Setup takes 3 queries and the final empty read plus status update 2;
+        # each chunk of 10 is a select, then in a savepoint the insert, the two
+        # counter statements and the progress update.
+        chunks = -(-self.active // 10)
+        with self.assertNumQueries(3 + 7 * chunks + 2):
+            self.assertEqual(fan_out(broadcast.pk, chunk_size=10), self.active)
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.total, broadcast.delivered), ('DONE', self.active, self.active))
+        self.assertEqual(Notification.objects.filter(message='Closed on Monday').count(), self.active)
+        self.assertFalse(Notification.objects.filter(user__username='banned').exists())
+        self.assertEqual(UnreadCounter.objects.get(user=self.admin).unread, 1)
+
+    def test_stalled_broadcast_resumes_after_last_recipient(self):
+        ids = list(User.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+        stalled = Broadcast.objects.create(message='Resumed', status='RUNNING', total=self.active, delivered=10,
+                                           last_user_id=ids[9], heartbeat_at=timezone.now() - timedelta(minutes=10))
+        live = Broadcast.objects.create(message='Still running', status='RUNNING')
+        out = io.StringIO()
+        call_command('resume_broadcasts', stdout=out)
+        self.assertEqual(out.getvalue(), f'resumed broadcast {stalled.pk}\n')
+        stalled.refresh_from_db()
+        self.assertEqual((stalled.status, stalled.total, stalled.delivered), ('DONE', self.active, self.active))
+        self.assertEqual(set(Notification.objects.filter(message='Resumed').values_list('user_id', flat=True)),
+                         set(ids[10:]))
+        live.refresh_from_db()
+        self.assertEqual(live.status, 'RUNNING')
+
+    def test_broadcast_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('notification-broadcast'), {'message': 'Hello all', 'notification_type': 'SUCCESS'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        progress = client.get(response.data['progress']).data
+        self.assertEqual((progress['status'], progress['delivered']), ('DONE', self.active))
+        self.assertEqual(client.post(reverse('notification-broadcast'), {}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        client.force_authenticate(User.objects.get(username='listener0'))
+        self.assertEqual(client.post(reverse('notification-broadcast'), {'message': 'x'}).status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.notifications = [Notification.objects.create(user=self.user, message=f'Note {n}') for n in range(4)]
+
+    def unread(self):
+        return self.client.get(reverse('notification-unread-count')).data['unread']
+
+    def test_counter_follows_single_row_changes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.unread(), 4)
+        self.notifications[0].mark_as_read()
+        self.notifications[1].delete()
+        self.notifications[0].delete()
+        Notification.objects.create(user=self.user, message='Read already', is_read=True)
+        self.assertEqual(self.unread(), 2)
+
+    def test_mark_ids_then_all(self):
+        other = User.objects.create_user(username='someone-else', password='pass12345')
+        foreign = Notification.objects.create(user=other, message='Not yours')
+        url = reverse('notification-mark-read')
+        response = self.client.post(url, {'ids': [self.notifications[0].pk, self.notifications[0].pk, foreign.pk]},
+                                    format='json')
+        self.assertEqual(response.data, {'updated': 1, 'unread': 3})
+        self.assertFalse(Notification.objects.get(pk=foreign.pk).is_read)
+
+        for ids in (str(self.notifications[1].pk), {str(self.notifications[1].pk): True}, ['x']):
+            response = self.client.post(url, {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Notification.objects.get(pk=self.notifications[1].pk).is_read)
+
+        # Two of these are the savepoint pairing the update with its counter.
+        with self.assertNumQueries(5):
+            response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.data, {'updated': 3, 'unread': 0})
+        self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), 0)
+
+    def test_list_uses_cursor_pagination(self):
+        response = self.client.get(reverse('notification-list-create'), {'page_size': 3})
+        self.assertEqual([n['message'] for n in response.data['results']], ['Note 3', 'Note 2', 'Note 1'])
+        self.assertNotIn('count', response.data)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([n['message'] for n in response.data['results']], ['Note 0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_missing_counter_is_rebuilt(self):
+        UnreadCounter.objects.all().delete()
+        self.assertEqual(self.unread(), 4)
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).unread, 4)
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='listener', password='pass12345')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def notify(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=self.user, message=message)
+
+    async def next_chunk(self, content):
+        chunk = await asyncio.wait_for(anext(content), timeout=5)
+        return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+    async def test_pushes_new_notifications(self):
+        client = AsyncClient()
+        response = await client.get(reverse('notification-stream'), headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertEqual(await self.next_chunk(content), 'retry: 3000\n\n')
+        self.assertTrue(broker.is_subscribed(self.user.pk))
+
+        notification = await sync_to_async(self.notify)('Your appointment is confirmed')
+        event = await self.next_chunk(content)
+        self.assertTrue(event.startswith(f'id: {notification.pk}\nevent: notification\n'))
+        self.assertIn('Your appointment is confirmed', event)
+        await content.aclose()
+
+    async def test_closed_stream_unsubscribes(self):
+        events = _events(broker.subscribe(self.user.pk), [])
+        await anext(events)
+        self.assertTrue(broker.is_subscribed(self.user.pk))
+        await events.aclose()
+        self.assertFalse(broker.is_subscribed(self.user.pk))
+
+    async def test_resumes_from_last_event_id(self):
+        first = await sync_to_async(self.notify)('First')
+        await sync_to_async(self.notify)('Second')
+        client = AsyncClient()
+        response = await client.get(reverse('notification-stream'), {'token': self.token},
+                                    headers={'Last-Event-ID': str(first.pk)})
+        content = aiter(response.streaming_content)
+        await self.next_chunk(content)
+        self.assertIn('Second', await self.next_chunk(content))
+        await content.aclose()
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get(reverse('notification-stream'), {'token': 'garbage'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refused_under_wsgi(self):
+        response = self.client.get(reverse('notification-stream'), headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(broker.is_subscribed(self.user.pk))
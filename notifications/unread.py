@@ -0,0 +1,49 @@
+"""
+Unread-notification counters.
+
+``UnreadCounter`` rows are adjusted with single UPDATE statements using
+``F()`` arithmetic, so concurrent changes never lose increments. A missing
+row is rebuilt from ``Notification`` the first time it is read.
+"""
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import Notification, UnreadCounter
+
+
+def increment(user_ids, by=1):
+    """Add ``by`` to the counters of every user in ``user_ids``."""
+    user_ids = list(user_ids)
+    UnreadCounter.objects.bulk_create([UnreadCounter(user_id=user_id, unread=0) for user_id in user_ids],
+                                      ignore_conflicts=True)
+    UnreadCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + by)
+
+
+def decrement(user_id, by=1):
+    UnreadCounter.objects.filter(user_id=user_id).update(unread=Greatest(F('unread') - by, Value(0)))
+
+
+def unread_count(user):
+    counter = UnreadCounter.objects.filter(user=user).values_list('unread', flat=True).first()
+    if counter is None:
+        counter = Notification.objects.filter(user=user, is_read=False).count()
+        UnreadCounter.objects.get_or_create(user=user, defaults={'unread': counter})
+    return counter
+
+
+def mark_read(user, ids=None):
+    """
+    Mark ``user``'s unread notifications (all, or only ``ids``) as read with
+    one UPDATE and return how many changed. The counter drops by exactly
+    that many in the same transaction, so a notification created meanwhile
+    stays counted.
+    """
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = unread.update(is_read=True)
+        if updated:
+            decrement(user.pk, updated)
+    return updated
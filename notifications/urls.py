@@ -1,8 +1,13 @@
 # notifications/urls.py
 from django.urls import path
-from .views import NotificationListCreateView, NotificationDetailView
+from .views import (NotificationListCreateView, NotificationDetailView, MailStatsView,
+                    UnreadCountView, MarkReadView, notification_stream)
 
 urlpatterns = [
     path('', NotificationListCreateView.as_view(), name='notification-list-create'),
     path('<int:pk>/', NotificationDetailView.as_view(), name='notification-detail'),
+    path('unread-count/', UnreadCountView.as_view(), name='notification-unread-count'),
+    path('mark-read/', MarkReadView.as_view(), name='notification-mark-read'),
+    path('stream/', notification_stream, name='notification-stream'),
+    path('mail-stats/', MailStatsView.as_view(), name='mail-stats'),
 ]
\ No newline at end of file
@@ -1,11 +1,26 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import generics, permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+from . import outbox, unread
+from .stream import OVERFLOW, broker, event_payload, format_event
 from .models import Notification
 from .serializers import NotificationSerializer
+from utils.pagination import CreatedAtCursorPagination
 
 class NotificationListCreateView(generics.ListCreateAPIView):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
@@ -17,3 +32,98 @@ class NotificationDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
+
+class MailStatsView(APIView):
+    """Outbox delivery counters and recent send rate, across all workers."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(outbox.stats())
+
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': unread.unread_count(request.user)})
+
+class MarkReadView(APIView):
+    """Mark all of the user's notifications, or just ``ids``, as read in one UPDATE."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        if ids is not None:
+            try:
+                # A string or dict would otherwise be iterated as characters or keys.
+                if not isinstance(ids, (list, tuple)):
+                    raise TypeError
+                ids = [int(pk) for pk in ids]
+            except (TypeError, ValueError):
+                return Response({'error': 'ids must be a list of notification ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        updated = unread.mark_read(request.user, ids)
+        return Response({'updated': updated, 'unread': unread.unread_count(request.user)})
+
+
+def _stream_user(request):
+    """JWT user from the Authorization header or, for EventSource clients, ``?token=``."""
+    authentication = JWTAuthentication()
+    try:
+        raw_token = request.GET.get('token')
+        if raw_token:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        result = authentication.authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new notifications. Must be
+    served by an ASGI server; each idle connection waits on its queue
+    without touching the database. Reconnecting clients send
+    ``Last-Event-ID`` and first receive what they missed.
+    """
+    if not isinstance(request, ASGIRequest):
+        # WSGI buffers the whole (endless) stream before sending anything.
+        return JsonResponse({'detail': 'The notification stream needs an ASGI server, '
+                                       'e.g. uvicorn hairsalon_backend.asgi:application.'}, status=501)
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    # Subscribe before reading the backlog so nothing lands in between.
+    subscription = broker.subscribe(user.pk)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    backlog = []
+    if last_event_id and last_event_id.isdigit():
+        backlog = await sync_to_async(list)(
+            Notification.objects.filter(user=user, pk__gt=int(last_event_id)).order_by('pk')[:100])
+
+    response = StreamingHttpResponse(_events(subscription, backlog), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _events(subscription, backlog):
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 25)
+    try:
+        yield 'retry: 3000\n\n'
+        last_sent = 0
+        for notification in backlog:
+            yield format_event(event_payload(notification))
+            last_sent = notification.pk
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event is OVERFLOW:
+                break
+            if event['id'] is not None and event['id'] <= last_sent:
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
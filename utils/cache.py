@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.checks import Tags, Warning, register
+
+# Backends whose contents other processes cannot see.
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def get_versions(keys):
+    """
+    Return the current value of each version counter in ``keys``.
+
+    Counters missing from the cache (never set, or evicted) are seeded with
+    the current time rather than zero, so a recreated counter can never
+    repeat a value an older cached entry was stored against.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def bump_versions(keys):
+    """Advance each version counter in ``keys``, invalidating entries stored against it."""
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Version counters only invalidate other workers' entries through a shared cache."""
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [Warning(
+        f'The default cache ({backend}) is not shared between processes.',
+        hint='Cache invalidation (nearby results, catalogue ETags, availability) only '
+             'reaches the process that made the change. Use Redis or Memcached when '
+             'running more than one worker.',
+        id='utils.W001',
+    )]
@@ -0,0 +1,94 @@
+"""
+Conditional GET and compression for read-mostly catalogue views.
+
+Every tracked model has a version counter and a last-modified timestamp in
+the cache, advanced by ``bump_table_versions`` from the model's
+``post_save``/``post_delete`` receivers once the change commits. A view using
+:class:`ConditionalGetMixin` derives a weak ETag and ``Last-Modified`` from
+the counters of its ``conditional_models`` (one cache round trip), so a
+client that already has the current representation gets ``304 Not
+Modified`` before any query or serializer runs.
+
+Bulk ``update()``/``bulk_create()`` skip signals; code doing those on a
+tracked model must call ``bump_table_versions`` itself.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import bump_versions, get_versions
+
+_gzip = GZipMiddleware(lambda request: None)
+
+
+def _version_key(model):
+    return f'table-version:{model._meta.label_lower}'
+
+
+def _modified_key(model):
+    return f'table-modified:{model._meta.label_lower}'
+
+
+def bump_table_versions(models):
+    """Mark ``models`` as changed, once the current transaction commits."""
+    def bump():
+        bump_versions([_version_key(model) for model in models])
+        # Last writer wins; no counter semantics needed for a timestamp.
+        cache.set_many({_modified_key(model): time.time_ns() for model in models}, timeout=None)
+    transaction.on_commit(bump)
+
+
+def table_state(models):
+    """Return ``(versions, last_modified)`` for ``models``; ``last_modified`` is a Unix timestamp."""
+    keys = [_version_key(model) for model in models]
+    modified_keys = [_modified_key(model) for model in models]
+    values = get_versions(keys + modified_keys)
+    return [values[key] for key in keys], max(values[key] for key in modified_keys) // 10 ** 9
+
+
+def compress(request, response):
+    """Gzip ``response`` when it is at least ``GZIP_MIN_LENGTH`` bytes and the client accepts it."""
+    if response.streaming or len(response.content) < getattr(settings, 'GZIP_MIN_LENGTH', 1024):
+        return response
+    return _gzip.process_response(request, response)
+
+
+class ConditionalGetMixin:
+    """
+    Weak ETag / Last-Modified handling for ``list`` and ``retrieve``, plus
+    gzip for large responses. The ETag covers the table versions, the full
+    path (page, filters, ``?fields=``) and the negotiated media type.
+    """
+    conditional_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        versions, last_modified = table_state(self.conditional_models)
+        fingerprint = '|'.join(map(str, versions + [request.get_full_path(), request.accepted_media_type]))
+        etag = 'W/"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()[:20]
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda rendered: compress(request, rendered))
+        return response
@@ -0,0 +1,137 @@
+"""
+Per-endpoint request metrics.
+
+:class:`RequestMetricsMiddleware` counts the SQL queries each request runs
+and the time spent in them (through ``connection.execute_wrapper``, so it
+works with ``DEBUG = False``), plus total time. The hook is installed from
+``process_view``, which runs on the view's own thread under WSGI and ASGI
+alike. Samples are kept per resolved URL name in a bounded in-process
+window; :func:`summary` reduces them to p50/p95/p99. Each process keeps its
+own numbers.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook that counts queries and sums their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(self._window)
+
+    @staticmethod
+    def _window():
+        return deque(maxlen=getattr(settings, 'REQUEST_METRICS_WINDOW', 1000))
+
+    def record(self, name, queries, db_ms, total_ms):
+        with self._lock:
+            self._samples[name].append((queries, db_ms, total_ms))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        return {
+            name: {
+                'requests': len(samples),
+                'queries': _percentiles([sample[0] for sample in samples]),
+                'db_ms': _percentiles([sample[1] for sample in samples]),
+                'total_ms': _percentiles([sample[2] for sample in samples]),
+            }
+            for name, samples in sorted(snapshot.items())
+        }
+
+
+def _percentiles(values):
+    values = sorted(values)
+    # Nearest-rank on the sorted window: the ceil(p% * n)-th smallest value.
+    return {f'p{p}': round(values[max(0, math.ceil(p * len(values) / 100) - 1)], 3) for p in (50, 95, 99)}
+
+
+store = MetricsStore()
+
+
+def summary():
+    return store.summary()
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time and total time for every resolved request.
+    Streaming responses (the notification stream) are not recorded: their
+    lifetime is the connection's.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = request._metrics_recorder = QueryRecorder()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self._unwrap(request)
+        self._record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = request._metrics_recorder = QueryRecorder()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._unwrap(request)
+        self._record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Database connections are per thread, so wrap the ones of the thread
+        # the view is about to run on. Async views query from other threads.
+        if iscoroutinefunction(view_func):
+            return None
+        request._metrics_connections = list(connections.all())
+        for connection in request._metrics_connections:
+            connection.execute_wrappers.append(request._metrics_recorder)
+        return None
+
+    @staticmethod
+    def _unwrap(request):
+        for connection in getattr(request, '_metrics_connections', ()):
+            connection.execute_wrappers.remove(request._metrics_recorder)
+
+    @staticmethod
+    def _record(request, response, recorder, total):
+        match = request.resolver_match
+        if match is not None and not response.streaming:
+            store.record(match.view_name, recorder.count, recorder.seconds * 1000, total * 1000)
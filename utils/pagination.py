@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first, for large append-mostly tables.
+
+    Each page is a range read on ``(created_at, id)`` rather than an
+    ``OFFSET`` plus ``COUNT(*)``, so page 1,000 costs the same as page one.
+    Responses carry ``next``/``previous`` cursors and no total count. Use it
+    on a view with ``pagination_class = CreatedAtCursorPagination``; the
+    model needs a ``created_at`` field, ideally indexed with the columns the
+    view filters on.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
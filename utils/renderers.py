@@ -0,0 +1,89 @@
+"""
+orjson-backed drop-in replacements for DRF's ``JSONRenderer`` and
+``JSONParser``.
+
+The output is the same JSON as DRF's compact renderer for the data this
+API returns, byte for byte in most cases. orjson formats dates, times and
+datetimes natively in the same ISO 8601 form, with ``OPT_UTC_Z`` for DRF's
+trailing ``Z``. Decimals, lazy strings, querysets and numpy values go to
+DRF's own ``JSONEncoder.default``, non-string dict keys are accepted like
+``json.dumps`` does, and U+2028/U+2029 are escaped. Known differences:
+
+* floats may be spelled differently (``1e-05`` can come out as
+  ``0.00001``, and the exponent form depends on the orjson version) but
+  always parse back to the same value;
+* UTC offsets with a seconds part (local mean time before ~1900) are
+  truncated to the minute.
+
+Indented output (``?format=json; indent=4``, the browsable API) and
+non-default ``UNICODE_JSON``/``COMPACT_JSON`` settings fall back to the
+stdlib renderer. NaN and ±Infinity raise ``ValueError`` like
+``JSONRenderer`` does under ``STRICT_JSON``; with ``STRICT_JSON`` off the
+stdlib renderer is used so they come out as ``NaN``/``Infinity``.
+"""
+import codecs
+import math
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+def _check_finite(data):
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, float):
+            if not math.isfinite(obj):
+                raise ValueError('Out of range float values are not JSON compliant: %r' % obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def __init__(self):
+        self._default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or not self.strict or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        converted = []
+
+        def default(obj):
+            value = self._default(obj)
+            converted.append(value)
+            return value
+
+        ret = orjson.dumps(data, default=default, option=OPTIONS)
+        # orjson writes NaN and ±Infinity as null; refuse them like
+        # JSONRenderer does. Only responses containing null need the walk.
+        if b'null' in ret:
+            _check_finite(data)
+            _check_finite(converted)
+        # Same JavaScript-subset escaping as JSONRenderer.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            if codecs.lookup(encoding).name == 'utf-8':
+                return orjson.loads(stream.read())
+            return orjson.loads(codecs.getreader(encoding)(stream).read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,238 @@
+"""
+Fast read-only list serialization.
+
+:func:`compile_values_serializer` inspects a ``ModelSerializer``'s fields
+once and returns the model columns to fetch with ``.values()`` plus a
+function that turns each row into exactly the dict the serializer would
+have produced. Per row that is a handful of dict lookups instead of
+building a model instance and walking DRF's field machinery.
+
+Plain scalar fields are copied as-is, foreign keys are read from their
+``<name>_id`` column (as ``PrimaryKeyRelatedField`` renders them), and
+fields with real formatting (decimals, datetimes) still go through their
+own ``to_representation``. Fields that cannot be built from a row, such as
+method fields or nested serializers, must be given a constant in
+``constants`` or the serializer is rejected.
+
+:class:`DynamicFieldsMixin` adds ``?fields=`` (sparse fieldsets) and
+``?expand=`` (embed a related object instead of its id) to read requests,
+and :class:`SparseFieldsetMixin` trims the view's queryset to match.
+"""
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns database values of these types unchanged.
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.FloatField,
+                      serializers.BooleanField)
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+@lru_cache(maxsize=128)
+def compile_values_serializer(serializer_class, constants=(), only=None):
+    """
+    Return ``(columns, to_dict)`` for ``serializer_class``. ``constants`` is a
+    tuple of ``(field_name, value)`` pairs for fields with no backing column;
+    ``only`` optionally restricts the output to a tuple of field names.
+    """
+    if serializer_class.to_representation is not serializers.ModelSerializer.to_representation:
+        raise UnsupportedField(f'{serializer_class.__name__} overrides to_representation')
+    constants = dict(constants)
+    columns = []
+    plan = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only or (only is not None and name not in only):
+            continue
+        if name in constants:
+            plan.append((name, None, constants[name]))
+            continue
+        if isinstance(field, ManyRelatedField) or isinstance(field, serializers.BaseSerializer) \
+                or field.source == '*' or '.' in field.source:
+            raise UnsupportedField(f'{serializer_class.__name__}.{name} cannot be built from .values()')
+        if isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise UnsupportedField(f'{serializer_class.__name__}.{name} uses pk_field')
+            column, convert = f'{field.source}_id', None
+        elif isinstance(field, PASSTHROUGH_FIELDS) and not isinstance(field, serializers.ChoiceField):
+            column, convert = field.source, None
+        elif isinstance(field, serializers.SerializerMethodField):
+            raise UnsupportedField(f'{serializer_class.__name__}.{name} is a method field')
+        elif isinstance(field, serializers.DecimalField):
+            column, convert = field.source, _decimal_converter(field)
+        else:
+            column, convert = field.source, field.to_representation
+        columns.append(column)
+        plan.append((name, column, convert))
+
+    def to_dict(row):
+        data = {}
+        for name, column, convert in plan:
+            if column is None:
+                data[name] = convert  # constant
+                continue
+            value = row[column]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    return columns, to_dict
+
+
+def _decimal_converter(field):
+    """
+    ``DecimalField.to_representation`` with its per-call context copy hoisted
+    out; falls back to the field itself for the options it does not cover.
+    """
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.normalize_output or field.localize or not coerce_to_string:
+        return field.to_representation
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+    return convert
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from ``.values()`` rows through the compiled mapping of
+    ``serializer_class``; the response is identical to the normal path.
+    Set ``fast_list_constants`` for fields with no column, e.g. a method
+    field that is always ``None`` in lists. ``FAST_LIST_SERIALIZATION =
+    False`` in settings turns it off everywhere.
+    """
+    fast_list_constants = {}
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'FAST_LIST_SERIALIZATION', True):
+            return super().list(request, *args, **kwargs)
+        serializer_class = self.get_serializer_class()
+        only = None
+        if issubclass(serializer_class, DynamicFieldsMixin):
+            if serializer_class.requested_expansions(request):
+                # Nested objects need model instances.
+                return super().list(request, *args, **kwargs)
+            fields = requested_names(request, 'fields')
+            # Unknown names are dropped so clients cannot grow the compile cache.
+            only = tuple(sorted(fields & field_names(serializer_class))) if fields else None
+        columns, to_dict = compile_values_serializer(
+            serializer_class, tuple(sorted(self.fast_list_constants.items())), only)
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns or ['pk'])
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([to_dict(row) for row in page])
+        return Response([to_dict(row) for row in queryset])
+
+
+@lru_cache(maxsize=None)
+def field_names(serializer_class):
+    """The names of the fields ``serializer_class`` can output."""
+    return frozenset(name for name, field in serializer_class().fields.items() if not field.write_only)
+
+
+def requested_names(request, param):
+    """The comma-separated names in query parameter ``param``, as a set."""
+    value = request.query_params.get(param, '')
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for ``?fields=name,price`` and ``?expand=salon``.
+
+    ``fields`` limits the output to the listed fields; ``expand`` replaces
+    the listed relations, declared in ``Meta.expandable_fields`` as
+    ``{field_name: serializer_class}``, with the nested object. Both apply
+    to the top-level serializer of a read request only, so writes always
+    validate against the full field set. Unknown names are ignored.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        expandable = self.expandable_fields()
+        for name in self.requested_expansions(request):
+            self.fields[name] = expandable[name](read_only=True)
+        fields = requested_names(request, 'fields')
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+    @classmethod
+    def expandable_fields(cls):
+        return getattr(cls.Meta, 'expandable_fields', {})
+
+    @classmethod
+    def requested_expansions(cls, request):
+        if request.method not in SAFE_METHODS:
+            return set()
+        expand = requested_names(request, 'expand') & set(cls.expandable_fields())
+        fields = requested_names(request, 'fields')
+        return expand & fields if fields else expand
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """
+        Select or prefetch the expanded relations and, for sparse fieldsets,
+        defer the columns the response does not use.
+        """
+        serializer = cls(context={'request': request})
+        opts = cls.Meta.model._meta
+        for name in cls.requested_expansions(request):
+            field = serializer.fields[name]
+            relation = opts.get_field(field.source)
+            if relation.many_to_many or relation.one_to_many:
+                queryset = queryset.prefetch_related(field.source)
+            else:
+                queryset = queryset.select_related(field.source)
+            for nested in field.fields.values():
+                if isinstance(nested, ManyRelatedField):
+                    queryset = queryset.prefetch_related(f'{field.source}__{nested.source}')
+
+        if not requested_names(request, 'fields'):
+            return queryset
+        columns = [opts.pk.name]
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                # A property or method; it may read any column.
+                return queryset
+            if model_field.concrete and not model_field.many_to_many:
+                columns.append(model_field.name)
+        return queryset.only(*columns)
+
+
+class SparseFieldsetMixin:
+    """
+    View mixin that shapes ``get_queryset`` for a serializer using
+    :class:`DynamicFieldsMixin`: only the requested columns, and expanded
+    relations loaded up front instead of once per row.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if self.request.method not in SAFE_METHODS or not issubclass(serializer_class, DynamicFieldsMixin):
+            return queryset
+        return serializer_class.optimize_queryset(queryset, self.request)
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    ``TestCase`` helpers that fail when code runs more SQL than it is allowed.
+    Unlike ``assertNumQueries`` the budget is a ceiling, so views can get
+    cheaper without the test needing an edit.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, label=''):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        if len(context) > budget:
+            queries = '\n'.join(f"{n}. {query['sql']}" for n, query in enumerate(context.captured_queries, 1))
+            self.fail(f"{label or 'Block'} ran {len(context)} queries, over its budget of {budget}:\n{queries}")
+
+    def assertWithinQueryBudget(self, client, url, budget, **params):
+        """GET ``url`` and fail if it errors or runs more than ``budget`` queries."""
+        with self.assertMaxQueries(budget, label=url):
+            response = client.get(url, params)
+        self.assertLess(response.status_code, 500, f'{url} returned {response.status_code}')
+        return response
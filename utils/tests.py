@@ -1,3 +1,146 @@
-from django.test import TestCase
+import io
+import json
+import uuid
+import zoneinfo
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Salon, Service
+from authentication.models import User
+from . import metrics
+from .cache import check_shared_cache
+from .renderers import ORJSONParser, ORJSONRenderer
+from .testing import QueryBudgetMixin
+
+
+class RequestMetricsTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        metrics.store.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='metrics-admin', password='pass12345', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def test_records_queries_and_percentiles_per_url_name(self):
+        for _ in range(4):
+            self.client.get(reverse('service-list'))
+        self.client.get('/api/no-such-endpoint/')
+        summary = self.client.get(reverse('request-metrics')).data
+        services = summary['service-list']
+        self.assertEqual(services['requests'], 4)
+        self.assertEqual(services['queries'], {'p50': 2, 'p95': 2, 'p99': 2})
+        self.assertGreater(services['total_ms']['p99'], 0)
+        self.assertGreaterEqual(services['total_ms']['p50'], services['db_ms']['p50'])
+        self.assertEqual(list(summary), ['service-list'])
+
+    async def test_records_async_requests(self):
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.admin)}'}
+        for _ in range(2):
+            response = await client.get(reverse('service-list'), headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        services = metrics.summary()['service-list']
+        self.assertEqual(services['requests'], 2)
+        # The two list queries plus the JWT user lookup.
+        self.assertEqual(services['queries'], {'p50': 3, 'p95': 3, 'p99': 3})
+        self.assertGreaterEqual(services['total_ms']['p50'], services['db_ms']['p50'])
+
+    def test_percentiles_are_nearest_rank(self):
+        self.assertEqual(metrics._percentiles([4, 1, 3, 2]), {'p50': 2, 'p95': 4, 'p99': 4})
+        self.assertEqual(metrics._percentiles(range(1, 101)), {'p50': 50, 'p95': 95, 'p99': 99})
+        self.assertEqual(metrics._percentiles([7]), {'p50': 7, 'p95': 7, 'p99': 7})
+
+    def test_metrics_are_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username='metrics-user', password='pass12345'))
+        self.assertEqual(self.client.get(reverse('request-metrics')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_budget_failure_lists_queries(self):
+        with self.assertRaisesMessage(AssertionError, 'over its budget of 0'):
+            with self.assertMaxQueries(0, label='lookup'):
+                User.objects.count()
+
+
+class ORJSONRendererTests(TestCase):
+    def assertSameAsStdlib(self, data, media_type=None, context=None):
+        expected = JSONRenderer().render(data, media_type, context)
+        self.assertEqual(ORJSONRenderer().render(data, media_type, context), expected)
+        return expected
+
+    def test_matches_stdlib_renderer(self):
+        london = zoneinfo.ZoneInfo('Europe/London')
+        self.assertSameAsStdlib({
+            'price': Decimal('12.50'), 'total': Decimal('0'),
+            'dates': [date(2030, 1, 7), time(9, 30), time(9, 30, 0, 250)],
+            'datetimes': [datetime(2030, 1, 7, 9, 30, tzinfo=timezone.utc),
+                          datetime(2030, 1, 7, 9, 30, 0, 123456, tzinfo=zoneinfo.ZoneInfo('UTC')),
+                          datetime(2030, 7, 7, 9, 30, tzinfo=london), datetime(2030, 1, 7, 9, 30)],
+            'other': [timedelta(minutes=90), uuid.UUID(int=7), gettext_lazy('Information'), np.float64(1.5),
+                      np.arange(3), None, True, 2 ** 40, 0.1],
+            'text': 'Långt — "quoted" \u2028\u2029',
+            1: 'int key',
+        })
+
+    def test_known_float_differences(self):
+        # The spelling of exponents differs (and varies across orjson
+        # versions), the values do not.
+        values = [1e-05, 1e16, 1.5e300]
+        self.assertEqual(json.loads(ORJSONRenderer().render(values)), values)
+
+    def test_non_finite_floats_raise_like_stdlib(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            for data in ([value], {'nested': [{'v': value}]}, [np.float64(value)], [Decimal(value)]):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render([None, 1.5]), b'[null,1.5]')
+
+    def test_non_strict_json_falls_back_to_stdlib(self):
+        renderer = ORJSONRenderer()
+        renderer.strict = False
+        self.assertEqual(renderer.render([float('nan')]), b'[NaN]')
+
+    def test_querysets_and_indent_fallback(self):
+        Service.objects.create(name='Cut', description='', price='20.00', duration=30,
+                               salon=Salon.objects.create(name='Render', address='1 St', city='C', phone='+1234567890'))
+        data = {'services': Service.objects.filter(name='Cut').values('name', 'price')}
+        self.assertEqual(self.assertSameAsStdlib(data), b'{"services":[{"name":"Cut","price":20.0}]}')
+        self.assertIn(b'\n    ', self.assertSameAsStdlib(data, 'application/json; indent=4'))
+        self.assertSameAsStdlib(data, context={'indent': 2})
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_api_responses_use_orjson(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='render-user', password='pass12345'))
+        response = client.get(reverse('service-list'))
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "Ångström", "n": [1, 2.5]}'.encode())),
+                         {'name': 'Ångström', 'n': [1, 2.5]})
+        latin = io.BytesIO('{"name": "Ångström"}'.encode('latin-1'))
+        self.assertEqual(parser.parse(latin, parser_context={'encoding': 'latin-1'}), {'name': 'Ångström'})
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+                parser.parse(io.BytesIO(body))
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_warns(self):
+        [warning] = check_shared_cache(None)
+        self.assertEqual(warning.id, 'utils.W001')
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                              'LOCATION': '/tmp/hairsalon-cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
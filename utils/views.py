@@ -1,3 +1,13 @@
-from django.shortcuts import render
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from . import metrics
+
+
+class RequestMetricsView(APIView):
+    """p50/p95/p99 query count, DB time and total time per URL name, for this process."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.summary())